@@ -3,61 +3,660 @@
 # Usage:
 #   python scripts/n8n_runner.py --config /absolute/path/to/config.yaml
 
-import argparse
 import json
 import os
+import select
+import shutil
 import sys
 import signal
 import time
 import subprocess
-import io
 import contextlib
+import functools
+import importlib
+import importlib.util
+import threading
+import types
 from pathlib import Path
 
+try:
+    import orjson
 
-def main() -> int:
-    parser = argparse.ArgumentParser(description="Run readme-sync from n8n and return JSON")
-    parser.add_argument("--config", required=False, help="Path to config.yaml")
-    parser.add_argument("--source", action="append", help="Source folder (can be repeated)")
-    parser.add_argument("--target", help="Target folder")
-    parser.add_argument("--sources-json", help='JSON array of sources, e.g. ["/a","/b"]')
-    parser.add_argument("--args-json", help='JSON object with keys {"sources": [...], "target": "..."}')
-    parser.add_argument("--args-file", help='Path to a file containing JSON object with keys {"sources": [...], "target": "..."}')
-    parser.add_argument(
-        "--mode",
-        choices=["sync", "clean", "reset", "stop", "reverse", "mappings"],
-        default="sync",
-        help="Operation mode: sync|clean|reset|stop|reverse|mappings",
+    def _dump(obj):
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+
+    _loads = orjson.loads
+except ImportError:
+    orjson = None
+
+    def _dump(obj):
+        return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+    _loads = json.loads
+
+
+def _load_json_file(path):
+    """Read a JSON file as raw bytes (no text decoding pass) and parse it."""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        size = os.fstat(fd).st_size
+        chunks = []
+        while True:
+            chunk = os.read(fd, max(size, 65536))
+            if not chunk:
+                break
+            chunks.append(chunk)
+    finally:
+        os.close(fd)
+    return _loads(b"".join(chunks))
+
+
+def _emit(obj):
+    """Write one JSON document to stdout as bytes (orjson when available)."""
+    sys.stdout.flush()
+    sys.stdout.buffer.write(_dump(obj) + b"\n")
+    sys.stdout.flush()
+
+
+def _emit_mappings(rows, **extra):
+    """Stream the mappings envelope row by row instead of serializing one big list."""
+    rows = iter(rows)
+    # Pull the first row before writing anything so query errors still yield clean JSON
+    first = next(rows, None)
+    out = sys.stdout.buffer
+    sys.stdout.flush()
+    out.write(b'{"success":true,"mode":"mappings","mappings":[')
+    count = 0
+    if first is not None:
+        out.write(_dump(first))
+        count = 1
+        for row in rows:
+            out.write(b",")
+            out.write(_dump(row))
+            count += 1
+    tail = _dump({"count": count, **extra})
+    out.write(b"]," + tail[1:] + b"\n")
+    sys.stdout.flush()
+
+
+# Known flags for the hand-rolled parser (argparse costs more than the work itself)
+FLAGS = {"--config", "--target", "--sources-json", "--args-json", "--args-file", "--mode"}
+MULTI = {"--source"}
+BOOL = {"--stop-daemon", "--capture-logs"}
+MODES = ("sync", "clean", "reset", "stop", "reverse", "mappings")
+
+USAGE = (
+    "usage: n8n_runner.py [--config PATH] [--source DIR]... [--target DIR]\n"
+    "                     [--sources-json JSON] [--args-json JSON] [--args-file PATH]\n"
+    "                     [--mode {sync,clean,reset,stop,reverse,mappings}] [--stop-daemon]\n"
+    "                     [--capture-logs]"
+)
+
+
+def parse_args(argv):
+    """Single-pass parser over argv; supports `--flag value` and `--flag=value`."""
+    values = {name: None for name in FLAGS}
+    values["--mode"] = "sync"
+    sources = []
+    switches = set()
+
+    i, n = 0, len(argv)
+    while i < n:
+        token = argv[i]
+        i += 1
+        if token in ("-h", "--help"):
+            print(USAGE)
+            raise SystemExit(0)
+        name, sep, value = token.partition("=")
+        if name in BOOL:
+            if sep:
+                raise ValueError(f"{name} does not take a value")
+            switches.add(name)
+            continue
+        if name not in FLAGS and name not in MULTI:
+            raise ValueError(f"unrecognized argument: {token}")
+        if not sep:
+            if i >= n:
+                raise ValueError(f"{name} expects a value")
+            value = argv[i]
+            i += 1
+        if name in MULTI:
+            sources.append(value)
+        else:
+            values[name] = value
+
+    if values["--mode"] not in MODES:
+        raise ValueError(
+            f"invalid --mode {values['--mode']!r} (choose from {', '.join(MODES)})"
+        )
+
+    return types.SimpleNamespace(
+        config=values["--config"],
+        source=sources or None,
+        target=values["--target"],
+        sources_json=values["--sources-json"],
+        args_json=values["--args-json"],
+        args_file=values["--args-file"],
+        mode=values["--mode"],
+        stop_daemon="--stop-daemon" in switches,
+        capture_logs="--capture-logs" in switches,
     )
-    parser.add_argument(
-        "--stop-daemon",
-        action="store_true",
-        help="When used with --mode reset, attempt to stop running daemon and unload LaunchAgent",
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+        return True
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+
+
+def _wait_for_exit(pid, timeout=10.0):
+    """Wait until `pid` exits; returns True if it is gone within `timeout` seconds.
+
+    Uses kqueue NOTE_EXIT where available (macOS/BSD) so we wake the moment the
+    process dies, otherwise polls with exponential backoff (5ms -> 500ms).
+    """
+    if not _pid_alive(pid):
+        return True
+    if hasattr(select, "kqueue"):
+        try:
+            kq = select.kqueue()
+            try:
+                ev = select.kevent(
+                    pid,
+                    filter=select.KQ_FILTER_PROC,
+                    flags=select.KQ_EV_ADD | select.KQ_EV_ENABLE | select.KQ_EV_ONESHOT,
+                    fflags=select.KQ_NOTE_EXIT,
+                )
+                kq.control([ev], 0)
+                kq.control(None, 1, timeout)
+            finally:
+                kq.close()
+            return not _pid_alive(pid)
+        except ProcessLookupError:
+            return True
+        except OSError:
+            pass  # fall back to polling
+    deadline = time.monotonic() + timeout
+    delay = 0.005
+    while _pid_alive(pid):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        time.sleep(min(delay, remaining))
+        delay = min(0.5, delay * 2)
+    return True
+
+
+# Daemon state files wiped by both stop and reset
+STATE_FILES = (
+    "daemon.pid", "daemon.status", "daemon.log",
+    "launchd.out", "launchd.err", "sync_data.db",
+)
+# Generic logs
+STATE_SUFFIXES = (".log",)
+# sqlite WAL sidecars: only removed together with their database, since the
+# -wal file may hold committed but not yet checkpointed transactions
+SQLITE_SIDECARS = ("-wal", "-shm")
+PLIST_NAMES = ("com.readme-sync.daemon.plist", "com.readme-sync.plist")
+_LAUNCHAGENTS = Path.home() / "Library" / "LaunchAgents"
+_PLIST_PATHS = tuple(str(_LAUNCHAGENTS / name) for name in PLIST_NAMES)
+
+
+def _signal_daemon(pid, sig):
+    """Signal the daemon's whole process group so any workers go down with it.
+
+    Falls back to signalling just `pid` when its group is our own (never kill
+    ourselves) or cannot be resolved.
+    """
+    try:
+        pgid = os.getpgid(pid)
+        if pgid != os.getpgrp():
+            os.killpg(pgid, sig)
+            return
+    except PermissionError:
+        pass
+    os.kill(pid, sig)
+
+
+def _spawn_wait(argv):
+    """Run a fire-and-forget command via posix_spawn with output discarded; returns its exit code.
+
+    Only the return code is used, so this skips subprocess's pipe setup entirely.
+    """
+    pid = os.posix_spawnp(
+        argv[0], argv, os.environ,
+        file_actions=[
+            (os.POSIX_SPAWN_OPEN, 1, os.devnull, os.O_WRONLY, 0),
+            (os.POSIX_SPAWN_OPEN, 2, os.devnull, os.O_WRONLY, 0),
+        ],
     )
-    args = parser.parse_args()
+    _, status = os.waitpid(pid, 0)
+    return os.WEXITSTATUS(status) if os.WIFEXITED(status) else -1
 
-    # Ensure src/ is importable when running from repo
-    repo_root = Path(__file__).resolve().parents[1]
-    src_dir = repo_root / "src"
-    if str(src_dir) not in sys.path:
-        sys.path.insert(0, str(src_dir))
 
+def _read_pid(pid_file):
+    """Parse the ASCII pid straight from bytes; int() already tolerates surrounding whitespace."""
+    fd = os.open(pid_file, os.O_RDONLY)
     try:
-        from readme_sync.services.config import ConfigManager
-        from readme_sync.services.database import DatabaseManager
-        from readme_sync.core.sync_engine import SyncEngine
-    except Exception as e:
-        # Output machine-readable JSON only
-        print(json.dumps({
+        return int(os.read(fd, 32))
+    finally:
+        os.close(fd)
+
+
+def _stop_daemon(conf_dir):
+    """Stop the daemon recorded in conf_dir/daemon.pid and unload its LaunchAgents.
+
+    Returns (daemon_stopped, unloaded_plist_paths).
+    """
+    daemon_stopped = False
+    unloaded = []
+    # Stop by PID
+    try:
+        # One open() instead of exists()+read; a missing pid file just means no daemon
+        try:
+            pid = _read_pid(conf_dir / "daemon.pid")
+        except FileNotFoundError:
+            pid = None
+        if pid is not None:
+            try:
+                _signal_daemon(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+            daemon_stopped = _wait_for_exit(pid, 10.0)
+            if not daemon_stopped:
+                try:
+                    _signal_daemon(pid, signal.SIGKILL)
+                    _wait_for_exit(pid, 1.0)
+                    daemon_stopped = True
+                except ProcessLookupError:
+                    daemon_stopped = True
+    except Exception:
+        pass
+
+    # Unload LaunchAgents: one `launchctl bootout` for all plists, per-file unload as fallback
+    plists = [p for p in _PLIST_PATHS if os.path.exists(p)]
+    if plists:
+        try:
+            if _spawn_wait(["launchctl", "bootout", f"gui/{os.getuid()}", *plists]) != 0:
+                for plist_path in plists:
+                    _spawn_wait(["launchctl", "unload", plist_path])
+        except Exception:
+            pass
+        for plist_path in plists:
+            try:
+                os.unlink(plist_path)
+                unloaded.append(plist_path)
+            except OSError:
+                pass
+    return daemon_stopped, unloaded
+
+
+def _wipe_state(conf_dir, extra_names=()):
+    """Remove daemon state, logs and the sidecars of removed databases under conf_dir; returns removed paths."""
+    names = set(STATE_FILES).union(extra_names)
+    removed = []
+    # Single directory pass: fixed names, sidecar suffixes and the logs/ directory
+    try:
+        with os.scandir(conf_dir) as it:
+            entries = list(it)
+    except OSError:
+        return removed
+    for entry in entries:
+        try:
+            if entry.is_dir(follow_symlinks=False):
+                if entry.name == "logs":
+                    shutil.rmtree(entry.path)
+                    removed.append(entry.path)
+            elif (entry.name in names or entry.name.endswith(STATE_SUFFIXES)
+                  or (entry.name.endswith(SQLITE_SIDECARS) and entry.name[:-4] in names)):
+                os.unlink(entry.path)
+                removed.append(entry.path)
+        except FileNotFoundError:
+            # Already gone (e.g. removed by the exiting daemon)
+            pass
+        except OSError:
+            pass
+    return removed
+
+
+def _drain(fd, buf):
+    while True:
+        chunk = os.read(fd, 65536)
+        if not chunk:
+            break
+        buf += chunk
+
+
+@contextlib.contextmanager
+def _capture_logs(enabled):
+    """Collect log output of the wrapped block into {"stdout": ..., "stderr": ...}.
+
+    By default nothing is buffered: Python-level stdout is routed to stderr so the
+    JSON document stays the only thing on stdout. With --capture-logs, fd 1/2 are
+    pointed at OS pipes drained by background threads (this also catches output of
+    C extensions and child processes).
+    """
+    logs = {"stdout": "", "stderr": ""}
+    if not enabled:
+        with contextlib.redirect_stdout(sys.stderr):
+            yield logs
+        return
+
+    sys.stdout.flush()
+    sys.stderr.flush()
+    saved, drains = [], []
+    for name, fd in (("stdout", 1), ("stderr", 2)):
+        r, w = os.pipe()
+        saved.append((fd, os.dup(fd)))
+        os.dup2(w, fd)
+        os.close(w)
+        buf = bytearray()
+        t = threading.Thread(target=_drain, args=(r, buf), daemon=True)
+        t.start()
+        drains.append((name, r, buf, t))
+    try:
+        yield logs
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        for fd, old in saved:
+            os.dup2(old, fd)
+            os.close(old)
+        for name, r, buf, t in drains:
+            # A detached grandchild may still hold the pipe; do not wait forever
+            t.join(timeout=5)
+            logs[name] = buf.decode("utf-8", "replace")
+            if not t.is_alive():
+                os.close(r)
+
+
+def _overrides_from_cli(args):
+    if not (args.source or args.target):
+        return None
+    overrides = {}
+    if args.source:
+        overrides["sources"] = args.source
+    if args.target:
+        overrides["target"] = args.target
+    return overrides
+
+
+def _overrides_from_env_sources_json(args):
+    raw = os.environ.get("READMESYNC_SOURCES_JSON")
+    return {"sources": _loads(raw)} if raw else None
+
+
+def _overrides_from_env_csv(args):
+    sources_csv = os.environ.get("READMESYNC_SOURCE_DIRS", "")
+    target_env = os.environ.get("READMESYNC_TARGET_DIR", "")
+    if not (sources_csv or target_env):
+        return None
+    overrides = {}
+    srcs = [s.strip() for s in sources_csv.split(',') if s.strip()]
+    if srcs:
+        overrides["sources"] = srcs
+    if target_env:
+        overrides["target"] = target_env
+    return overrides
+
+
+# Runtime override sources, highest priority first:
+# args-file > args-json > CLI --source/--target > env vars
+OVERRIDE_SOURCES = (
+    ("args_file", lambda a: _load_json_file(a.args_file) if a.args_file else None),
+    ("args_json", lambda a: _loads(a.args_json) if a.args_json else None),
+    ("cli_args", _overrides_from_cli),
+    ("env_args_json", lambda a: _loads(os.environ["READMESYNC_ARGS_JSON"])
+        if os.environ.get("READMESYNC_ARGS_JSON") else None),
+    ("env_sources_json", _overrides_from_env_sources_json),
+    ("env_csv", _overrides_from_env_csv),
+)
+
+
+def resolve_overrides(args):
+    """Return (overrides, origin) from the first source that yields a value."""
+    for origin, probe in OVERRIDE_SOURCES:
+        try:
+            value = probe(args)
+        except Exception:
+            value = None
+        if value is not None:
+            return value, origin
+    return None, None
+
+
+@functools.lru_cache(maxsize=None)
+def _find_cli():
+    """Resolve (readme-sync path or None, python interpreter) with one PATH walk each."""
+    cli_path = shutil.which("readme-sync")
+    if cli_path:
+        return cli_path, None
+    return None, shutil.which("python3") or shutil.which("python") or "python3"
+
+
+def _wait_for_pid_file(pid_file, proc, timeout=5.0):
+    """Poll for the daemon's pid file with backoff (10ms -> 320ms).
+
+    Gives up early if the starter process exits non-zero. The budget covers the
+    CLI's own cold start, which can exceed a second before the daemon forks.
+    """
+    deadline = time.monotonic() + timeout
+    delay = 0.01
+    while True:
+        if os.path.isfile(pid_file):
+            return proc.poll() in (None, 0)
+        rc = proc.poll()
+        if rc not in (None, 0):
+            return False
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        time.sleep(min(delay, remaining))
+        delay = min(0.32, delay * 2)
+
+
+def _lazy(module, attr):
+    """Import `attr` from `module` on first use so each mode only loads what it touches."""
+    return getattr(importlib.import_module(module), attr)
+
+
+def _open_config(config_path, overrides):
+    cfg = _lazy("readme_sync.services.config", "ConfigManager")(
+        config_path, runtime_overrides=overrides
+    )
+    # 若提供了覆盖参数，则确保将有效配置写盘，便于后续无覆盖的组件读取
+    try:
+        if overrides is not None:
+            cfg.save_config()
+    except Exception:
+        pass
+    return cfg
+
+
+def _effective_paths(cfg):
+    """Resolve (enabled source folders, target folder) once for the JSON envelope."""
+    return cfg.get_enabled_source_folders(), cfg.get_target_folder()
+
+
+def _open_db(cfg):
+    # Reuse the already-loaded config instead of letting DatabaseManager build its own
+    return _lazy("readme_sync.services.database", "DatabaseManager").from_config(cfg)
+
+
+def _run_sync(args, ctx):
+    cfg = _open_config(ctx.config_path, ctx.overrides)
+    effective_sources, effective_target = _effective_paths(cfg)
+    db = _open_db(cfg)
+    engine = _lazy("readme_sync.core.sync_engine", "SyncEngine")(cfg, db)
+
+    with _capture_logs(args.capture_logs) as logs:
+        result = engine.sync_all()
+
+    return {
+        "success": True,
+        "mode": "sync",
+        "result": result,
+        "effective_sources": effective_sources,
+        "effective_target": effective_target,
+        "logs": logs,
+    }
+
+
+def _run_clean(args, ctx):
+    cfg = _open_config(ctx.config_path, ctx.overrides)
+    effective_sources, effective_target = _effective_paths(cfg)
+    db = _open_db(cfg)
+
+    with _capture_logs(args.capture_logs) as logs:
+        orphaned = db.cleanup_orphaned_mappings(cfg)
+        moved = 0
+        target = effective_target
+        if target and os.path.exists(target) and cfg.get_move_unlinked_files():
+            moved = db.move_unlinked_files(target, cfg.get_unlinked_subfolder())
+
+    return {
+        "success": True,
+        "mode": "clean",
+        "orphaned_removed": orphaned,
+        "unlinked_moved": moved,
+        "effective_sources": effective_sources,
+        "effective_target": effective_target,
+        "logs": logs,
+    }
+
+
+def _run_stop(args, ctx):
+    # 仅需配置目录：不加载配置、不打开数据库
+    conf_dir = _lazy("readme_sync.services.config", "ConfigManager").config_dir_for(ctx.config_path)
+    with _capture_logs(args.capture_logs) as logs:
+        daemon_stopped, unloaded = _stop_daemon(conf_dir)
+        removed = _wipe_state(conf_dir)
+
+    return {
+        "success": True,
+        "mode": "stop",
+        "daemon_stopped": daemon_stopped,
+        "launchagents_removed": unloaded,
+        "removed": removed,
+        "config_dir": str(conf_dir),
+        "logs": logs,
+    }
+
+
+def _run_reverse(args, ctx):
+    force = os.environ.get("READMESYNC_FORCE", "false").lower() in ("1","true","yes")
+    cfg = _open_config(ctx.config_path, ctx.overrides)
+    db = _open_db(cfg)
+    engine = _lazy("readme_sync.core.sync_engine", "SyncEngine")(cfg, db)
+
+    with _capture_logs(args.capture_logs) as logs:
+        data = engine.reverse_all(force=force)
+
+    return {
+        "success": True,
+        "mode": "reverse",
+        **data,
+        "force": force,
+        "logs": logs,
+    }
+
+
+def _run_mappings(args, ctx):
+    # List all existing mappings as JSON (streamed, so nothing is returned)
+    cfg = _open_config(ctx.config_path, ctx.overrides)
+    effective_sources, effective_target = _effective_paths(cfg)
+    db = _open_db(cfg)
+    _emit_mappings(
+        db.iter_all_mappings(),
+        effective_sources=effective_sources,
+        effective_target=effective_target,
+    )
+    return None
+
+
+def _start_daemon(conf_dir):
+    """Start the daemon via the CLI entrypoint; returns (restarted, start_cmd)."""
+    # Prefer 'readme-sync daemon start'
+    cli_path, py = _find_cli()
+    if cli_path:
+        cmd = ["readme-sync", "daemon", "start"]
+    else:
+        # Fallback
+        cmd = [py, "-m", "readme_sync.cli", "daemon", "start"]
+    start_cmd = " ".join(cmd)
+    try:
+        env = os.environ.copy()
+        # Ensure overrides propagate to daemon
+        proc = subprocess.Popen(
+            cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            env=env, start_new_session=True,
+        )
+        return _wait_for_pid_file(conf_dir / "daemon.pid", proc), start_cmd
+    except Exception:
+        return False, start_cmd
+
+
+def _run_reset(args, ctx):
+    # reset = stop + wipe + restart
+    conf_dir = _lazy("readme_sync.services.config", "ConfigManager").config_dir_for(ctx.config_path)
+    # 覆盖参数需落盘，供重启后的守护进程读取
+    if ctx.overrides is not None:
+        _open_config(ctx.config_path, ctx.overrides)
+
+    with _capture_logs(args.capture_logs) as logs:
+        daemon_stopped, unloaded = _stop_daemon(conf_dir)
+        # Remove database, state and residuals
+        removed = _wipe_state(conf_dir, extra_names=("database.db", "scan_folders.json"))
+        restarted, start_cmd = _start_daemon(conf_dir)
+
+    return {
+        "success": True,
+        "mode": "reset",
+        "daemon_stopped": daemon_stopped,
+        "launchagents_removed": unloaded,
+        "removed": removed,
+        "config_dir": str(conf_dir),
+        "restarted": restarted,
+        "start_cmd": start_cmd,
+        "logs": logs,
+    }
+
+
+DISPATCH = {
+    "sync": _run_sync,
+    "clean": _run_clean,
+    "stop": _run_stop,
+    "reverse": _run_reverse,
+    "mappings": _run_mappings,
+    "reset": _run_reset,
+}
+
+
+def main() -> int:
+    try:
+        args = parse_args(sys.argv[1:])
+    except ValueError as e:
+        print(USAGE, file=sys.stderr)
+        _emit({
             "success": False,
-            "mode": args.mode,
+            "mode": None,
             "error": {
-                "type": "ImportError",
+                "type": "UsageError",
                 "message": str(e),
             },
-            "sys_path": sys.path,
-        }, ensure_ascii=False))
-        return 1
+        })
+        return 2
+
+    # Ensure src/ is importable when running from repo (skipped when the package is installed)
+    if importlib.util.find_spec("readme_sync") is None:
+        repo_root = Path(__file__).resolve().parents[1]
+        src_dir = repo_root / "src"
+        if str(src_dir) not in sys.path:
+            sys.path.insert(0, str(src_dir))
 
     config_path = args.config or os.environ.get(
         "READMESYNC_CONFIG",
@@ -70,58 +669,7 @@ def main() -> int:
             os.environ["READMESYNC_SOURCE_DIRS"] = ",".join(args.source)
         if args.sources_json:
             os.environ["READMESYNC_SOURCES_JSON"] = args.sources_json
-        override_origin = None
-        overrides: dict | None = None
-        # 1) Prefer args-file
-        if args.args_file:
-            try:
-                with open(args.args_file, 'r', encoding='utf-8') as f:
-                    overrides = json.load(f)
-                    override_origin = "args_file"
-            except Exception:
-                overrides = None
-        # 2) Then args-json
-        if overrides is None and args.args_json:
-            try:
-                overrides = json.loads(args.args_json)
-                override_origin = "args_json"
-            except Exception:
-                overrides = None
-        # 3) Fallback to CLI --source/--target
-        if overrides is None and (args.source or args.target):
-            overrides = {}
-            override_origin = "cli_args"
-            if args.source:
-                overrides["sources"] = args.source
-            if args.target:
-                overrides["target"] = args.target
-        # 4) Finally env vars
-        if overrides is None:
-            try:
-                if os.environ.get("READMESYNC_ARGS_JSON"):
-                    overrides = json.loads(os.environ["READMESYNC_ARGS_JSON"])  # type: ignore
-                    override_origin = "env_args_json"
-            except Exception:
-                overrides = None
-        if overrides is None:
-            try:
-                if os.environ.get("READMESYNC_SOURCES_JSON"):
-                    arr = json.loads(os.environ["READMESYNC_SOURCES_JSON"])  # type: ignore
-                    overrides = {"sources": arr}
-                    override_origin = "env_sources_json"
-            except Exception:
-                overrides = None
-        if overrides is None:
-            if os.environ.get("READMESYNC_SOURCE_DIRS") or os.environ.get("READMESYNC_TARGET_DIR"):
-                override_origin = "env_csv"
-                sources_csv = os.environ.get("READMESYNC_SOURCE_DIRS", "")
-                target_env = os.environ.get("READMESYNC_TARGET_DIR", "")
-                srcs = [s.strip() for s in sources_csv.split(',') if s.strip()]
-                overrides = {}
-                if srcs:
-                    overrides["sources"] = srcs
-                if target_env:
-                    overrides["target"] = target_env
+        overrides, override_origin = resolve_overrides(args)
 
         # Propagate config path and runtime overrides to child components
         os.environ["READMESYNC_CONFIG"] = str(config_path)
@@ -131,339 +679,32 @@ def main() -> int:
             except Exception:
                 pass
 
-        cfg = ConfigManager(config_path, runtime_overrides=overrides)
-        # 若提供了覆盖参数，则确保将有效配置写盘，便于后续无覆盖的组件读取
-        try:
-            if overrides is not None:
-                cfg.save_config()
-        except Exception:
-            pass
-        db = DatabaseManager()
-
-        if args.mode == "sync":
-            engine = SyncEngine(cfg, db)
-
-            def _do_sync():
-                return engine.sync_all()
-
-            result, cap_out, cap_err = None, "", ""
-            with contextlib.redirect_stdout(io.StringIO()) as _out, contextlib.redirect_stderr(io.StringIO()) as _err:
-                result = _do_sync()
-                cap_out = _out.getvalue()
-                cap_err = _err.getvalue()
-
-            print(json.dumps({
-                "success": True,
-                "mode": "sync",
-                "result": result,
-                "effective_sources": cfg.get_enabled_source_folders(),
-                "effective_target": cfg.get_target_folder(),
-                "logs": {
-                    "stdout": cap_out,
-                    "stderr": cap_err,
-                },
-            }, ensure_ascii=False))
-
-        elif args.mode == "clean":
-
-            def _do_clean():
-                orphaned = db.cleanup_orphaned_mappings()
-                moved = 0
-                target = cfg.get_target_folder()
-                if target and os.path.exists(target) and cfg.get_move_unlinked_files():
-                    moved = db.move_unlinked_files(target, cfg.get_unlinked_subfolder())
-                return {"orphaned_removed": orphaned, "unlinked_moved": moved}
-
-            data, cap_out, cap_err = None, "", ""
-            with contextlib.redirect_stdout(io.StringIO()) as _out, contextlib.redirect_stderr(io.StringIO()) as _err:
-                data = _do_clean()
-                cap_out = _out.getvalue()
-                cap_err = _err.getvalue()
-
-            print(json.dumps({
-                "success": True,
-                "mode": "clean",
-                **data,
-                "effective_sources": cfg.get_enabled_source_folders(),
-                "effective_target": cfg.get_target_folder(),
-                "logs": {
-                    "stdout": cap_out,
-                    "stderr": cap_err,
-                },
-            }, ensure_ascii=False))
-
-        elif args.mode == "stop":
-            conf_dir = Path(cfg.get_config_dir())
-            removed = []
-            daemon_stopped = False
-            unloaded = []
-
-            def _do_stop():
-                nonlocal daemon_stopped, unloaded
-                # Stop by PID
-                pid_file = conf_dir / "daemon.pid"
-                try:
-                    if pid_file.exists():
-                        pid = int(pid_file.read_text().strip())
-                        try:
-                            os.kill(pid, signal.SIGTERM)
-                        except ProcessLookupError:
-                            pass
-                        for _ in range(10):
-                            try:
-                                os.kill(pid, 0)
-                                time.sleep(1)
-                            except ProcessLookupError:
-                                daemon_stopped = True
-                                break
-                        if not daemon_stopped:
-                            try:
-                                os.kill(pid, signal.SIGKILL)
-                                time.sleep(1)
-                                daemon_stopped = True
-                            except ProcessLookupError:
-                                daemon_stopped = True
-                except Exception:
-                    pass
-
-                # Unload LaunchAgents
-                home = Path.home()
-                for plist_name in ("com.readme-sync.daemon.plist", "com.readme-sync.plist"):
-                    plist_path = home / "Library" / "LaunchAgents" / plist_name
-                    if plist_path.exists():
-                        try:
-                            subprocess.run(["launchctl", "unload", str(plist_path)], capture_output=True)
-                        except Exception:
-                            pass
-                        try:
-                            plist_path.unlink()
-                            unloaded.append(str(plist_path))
-                        except Exception:
-                            pass
-
-            def _remove_state():
-                names = (
-                    "daemon.pid", "daemon.status", "daemon.log",
-                    "launchd.out", "launchd.err", "sync_data.db"
-                )
-                for name in names:
-                    p = conf_dir / name
-                    try:
-                        if p.exists():
-                            p.unlink()
-                            removed.append(str(p))
-                    except Exception:
-                        pass
-                # Remove sqlite sidecar files
-                for pat in ("*.db-wal", "*.db-shm", "*.log"):
-                    for fp in conf_dir.glob(pat):
-                        try:
-                            fp.unlink()
-                            removed.append(str(fp))
-                        except Exception:
-                            pass
-                # Remove logs directory if present
-                logs_dir = conf_dir / "logs"
-                if logs_dir.exists() and logs_dir.is_dir():
-                    import shutil
-                    try:
-                        shutil.rmtree(logs_dir)
-                        removed.append(str(logs_dir))
-                    except Exception:
-                        pass
-
-            cap_out, cap_err = "", ""
-            with contextlib.redirect_stdout(io.StringIO()) as _out, contextlib.redirect_stderr(io.StringIO()) as _err:
-                _do_stop()
-                _remove_state()
-                cap_out = _out.getvalue()
-                cap_err = _err.getvalue()
-
-            print(json.dumps({
-                "success": True,
-                "mode": "stop",
-                "daemon_stopped": daemon_stopped,
-                "launchagents_removed": unloaded,
-                "removed": removed,
-                "config_dir": str(conf_dir),
-                "logs": {"stdout": cap_out, "stderr": cap_err},
-            }, ensure_ascii=False))
-
-        elif args.mode == "reverse":
-            force = os.environ.get("READMESYNC_FORCE", "false").lower() in ("1","true","yes")
-            engine = SyncEngine(cfg, db)
-
-            def _do_rev():
-                return engine.reverse_all(force=force)
-
-            data, cap_out, cap_err = None, "", ""
-            with contextlib.redirect_stdout(io.StringIO()) as _out, contextlib.redirect_stderr(io.StringIO()) as _err:
-                data = _do_rev()
-                cap_out = _out.getvalue()
-                cap_err = _err.getvalue()
-
-            print(json.dumps({
-                "success": True,
-                "mode": "reverse",
-                **data,
-                "force": force,
-                "logs": {"stdout": cap_out, "stderr": cap_err},
-            }, ensure_ascii=False))
-
-        elif args.mode == "mappings":
-            # List all existing mappings as JSON
-            rows = db.get_all_mappings()
-            print(json.dumps({
-                "success": True,
-                "mode": "mappings",
-                "count": len(rows),
-                "mappings": rows,
-                "effective_sources": cfg.get_enabled_source_folders(),
-                "effective_target": cfg.get_target_folder(),
-            }, ensure_ascii=False))
-        else:  # reset (stop + wipe + restart)
-            conf_dir = Path(cfg.get_config_dir())
-            removed = []
-            daemon_stopped = False
-            unloaded = []
-            restarted = False
-            start_cmd = None
-
-            # Optionally try to stop daemon by PID and unload LaunchAgents
-            def _do_reset_stop():
-                nonlocal daemon_stopped, unloaded
-                if not args.stop_daemon:
-                    # For reset semantics, perform stop by default
-                    pass
-                pid_file = conf_dir / "daemon.pid"
-                try:
-                    if pid_file.exists():
-                        pid = int(pid_file.read_text().strip())
-                        try:
-                            os.kill(pid, signal.SIGTERM)
-                        except ProcessLookupError:
-                            pass
-                        for _ in range(10):
-                            try:
-                                os.kill(pid, 0)
-                                time.sleep(1)
-                            except ProcessLookupError:
-                                daemon_stopped = True
-                                break
-                        if not daemon_stopped:
-                            try:
-                                os.kill(pid, signal.SIGKILL)
-                                time.sleep(1)
-                                daemon_stopped = True
-                            except ProcessLookupError:
-                                daemon_stopped = True
-                except Exception:
-                    pass
-
-                home = Path.home()
-                for plist_name in ("com.readme-sync.daemon.plist", "com.readme-sync.plist"):
-                    plist_path = home / "Library" / "LaunchAgents" / plist_name
-                    if plist_path.exists():
-                        try:
-                            subprocess.run(["launchctl", "unload", str(plist_path)], capture_output=True)
-                        except Exception:
-                            pass
-                        try:
-                            plist_path.unlink()
-                            unloaded.append(str(plist_path))
-                        except Exception:
-                            pass
-
-            def _do_reset_remove():
-                # Remove database, state and residuals
-                names = (
-                    "database.db", "sync_data.db",
-                    "daemon.pid", "daemon.status", "daemon.log",
-                    "launchd.out", "launchd.err",
-                    "scan_folders.json"
-                )
-                for name in names:
-                    p = conf_dir / name
-                    try:
-                        if p.exists():
-                            p.unlink()
-                            removed.append(str(p))
-                    except Exception:
-                        pass
-                # Remove sqlite sidecar files and generic logs
-                for pat in ("*.db-wal", "*.db-shm", "*.log"):
-                    for fp in conf_dir.glob(pat):
-                        try:
-                            fp.unlink()
-                            removed.append(str(fp))
-                        except Exception:
-                            pass
-                # Remove logs directory if present
-                logs_dir = conf_dir / "logs"
-                if logs_dir.exists() and logs_dir.is_dir():
-                    import shutil
-                    try:
-                        shutil.rmtree(logs_dir)
-                        removed.append(str(logs_dir))
-                    except Exception:
-                        pass
-
-            def _do_reset_start():
-                nonlocal restarted, start_cmd
-                # Try to start via CLI entrypoint
-                # Prefer 'readme-sync daemon start'
-                cmd = None
-                from shutil import which
-                if which("readme-sync"):
-                    cmd = ["readme-sync", "daemon", "start"]
-                else:
-                    # Fallback
-                    py = which("python3") or which("python") or "python3"
-                    cmd = [py, "-m", "readme_sync.cli", "daemon", "start"]
-                start_cmd = " ".join(cmd)
-                try:
-                    env = os.environ.copy()
-                    # Ensure overrides propagate to daemon
-                    res = subprocess.run(cmd, capture_output=True, text=True, env=env)
-                    # Small wait and check pid file appears
-                    time.sleep(1.0)
-                    if (conf_dir / "daemon.pid").exists() and res.returncode == 0:
-                        restarted = True
-                except Exception:
-                    restarted = False
-
-            cap_out, cap_err = "", ""
-            with contextlib.redirect_stdout(io.StringIO()) as _out, contextlib.redirect_stderr(io.StringIO()) as _err:
-                _do_reset_stop()
-                _do_reset_remove()
-                _do_reset_start()
-                cap_out = _out.getvalue()
-                cap_err = _err.getvalue()
-
-            print(json.dumps({
-                "success": True,
-                "mode": "reset",
-                "daemon_stopped": daemon_stopped,
-                "launchagents_removed": unloaded,
-                "removed": removed,
-                "config_dir": str(conf_dir),
-                "restarted": restarted,
-                "start_cmd": start_cmd,
-                "logs": {
-                    "stdout": cap_out,
-                    "stderr": cap_err,
-                },
-            }, ensure_ascii=False))
+        ctx = types.SimpleNamespace(config_path=config_path, overrides=overrides)
+        out = DISPATCH[args.mode](args, ctx)
+        if out is not None:
+            _emit(out)
         return 0
+    except ImportError as e:
+        # Output machine-readable JSON only
+        _emit({
+            "success": False,
+            "mode": args.mode,
+            "error": {
+                "type": "ImportError",
+                "message": str(e),
+            },
+            "sys_path": sys.path,
+        })
+        return 1
     except Exception as e:
-        print(json.dumps({
+        _emit({
             "success": False,
             "mode": args.mode,
             "error": {
                 "type": "RuntimeError",
                 "message": str(e),
             }
-        }, ensure_ascii=False))
+        })
         return 2
 
 
@@ -2,22 +2,18 @@
 """命令行界面模块 - 基于Typer框架"""
 
 import typer
+import json
 import os
+import sys
 import time
-from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from types import SimpleNamespace
+from typing import Iterator, List, Optional
 from rich.console import Console
-from rich.table import Table
-from rich.progress import Progress
 
-from .services.config import ConfigManager
-from .services.database import DatabaseManager
-from .core.sync_engine import SyncEngine
-from .core.scanner import FileScanner
-from .services.watcher import RealtimeSyncManager
-from .services.daemon import DaemonManager, format_uptime, format_memory
-from .services.autostart import get_platform_manager
+from .services._statcache import cached_expanduser
+
+# 各服务模块（SQLite、watchdog、psutil 等）按需在命令内部导入，避免拖慢 CLI 启动
 
 # 创建应用实例
 app = typer.Typer(
@@ -41,16 +37,157 @@ app.add_typer(conflicts_app)
 
 console = Console()
 
+# 输出中统一使用的时间格式
+TIME_FMT = "%Y-%m-%d %H:%M:%S"
+
+
+def _fmt_ts(timestamp: float) -> str:
+    """将 Unix 时间戳格式化为本地时间字符串"""
+    return time.strftime(TIME_FMT, time.localtime(timestamp))
+
+
+# SyncEngine.sync_all()/reverse_sync_from_target() 返回的计数项，按显示顺序排列
+_RESULT_KEYS = (
+    "scanned", "synced", "reverse_synced", "conflicts", "errors",
+    "moved_detected", "unlinked_moved", "no_mapping",
+)
+
+
+def _result_lines(results: dict) -> list:
+    """按固定顺序列出非零的同步计数"""
+    lines = []
+    for key in _RESULT_KEYS:
+        value = results.get(key, 0)
+        if value:
+            lines.append(f"  {key}: {value}")
+    return lines
+
+
+@app.callback()
+def main_callback(
+    ctx: typer.Context,
+    skip_validate: bool = typer.Option(
+        False, "--skip-validate", envvar="READMESYNC_SKIP_VALIDATE",
+        help="跳过同步前的配置验证（脚本批量调用时使用）"
+    )
+):
+    """README同步管理器 - 集中管理所有项目的README.md文件"""
+    _state(ctx).skip_validate = skip_validate
+
+
+def _state(ctx: typer.Context) -> SimpleNamespace:
+    """取得本次调用共享的状态对象（子命令组的 ctx.obj 继承自根命令）"""
+    if ctx.obj is None:
+        ctx.obj = SimpleNamespace(config=None, db=None, engine=None, skip_validate=False)
+    return ctx.obj
+
+
+def get_config(ctx: typer.Context):
+    """懒加载并缓存 ConfigManager，同一进程内只解析一次配置文件"""
+    state = _state(ctx)
+    if state.config is None:
+        from .services.config import ConfigManager
+        state.config = ConfigManager()
+    return state.config
+
+
+def get_db(ctx: typer.Context):
+    """懒加载并缓存 DatabaseManager，复用已加载的配置"""
+    state = _state(ctx)
+    if state.db is None:
+        from .services.database import DatabaseManager
+        state.db = DatabaseManager.from_config(get_config(ctx))
+    return state.db
+
+
+def get_engine(ctx: typer.Context):
+    """懒加载并缓存 SyncEngine，复用共享的配置与数据库"""
+    state = _state(ctx)
+    if state.engine is None:
+        from .core.sync_engine import SyncEngine
+        state.engine = SyncEngine(get_config(ctx), get_db(ctx))
+    return state.engine
+
+
+def get_config_errors(ctx: typer.Context):
+    """返回配置验证结果（ConfigManager 按配置文件 mtime/size 缓存）；--skip-validate 时直接跳过"""
+    if _state(ctx).skip_validate:
+        return []
+    return get_config(ctx).validate_config()
+
+
+def _echo_json(data) -> None:
+    """以单行 JSON 写出机器可读结果（供脚本解析，不经过 Rich 渲染）"""
+    sys.stdout.write(json.dumps(data, ensure_ascii=False, default=str) + "\n")
+    sys.stdout.flush()
+
+
+def _wait_event(event, timeout: Optional[float]) -> bool:
+    """等待事件或超时；Windows 上阻塞的锁等待无法被 Ctrl+C 打断，改为每秒切片等待"""
+    if os.name != "nt":
+        return event.wait(timeout)
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while True:
+        step = 1.0 if deadline is None else min(1.0, deadline - time.monotonic())
+        if step <= 0:
+            return event.is_set()
+        if event.wait(step):
+            return True
+
+
+def _edit_source_folders() -> List[str]:
+    """打开编辑器（$VISUAL / $EDITOR）一次性输入源文件夹（每行一个，# 开头为注释）"""
+    import shlex
+    import subprocess
+    import tempfile
+    
+    editor = os.environ.get("VISUAL") or os.environ.get("EDITOR") or ("notepad" if os.name == "nt" else "vi")
+    fd, path = tempfile.mkstemp(prefix="readme-sync-", suffix=".txt")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write("# 每行一个源文件夹路径，# 开头的行将被忽略\n")
+        try:
+            subprocess.run(shlex.split(editor, posix=os.name != "nt") + [path], check=True)
+        except (OSError, subprocess.CalledProcessError) as e:
+            console.print(f"启动编辑器失败: {e}", style="red")
+            return []
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read()
+    finally:
+        os.unlink(path)
+    
+    return [
+        line.strip() for line in text.splitlines()
+        if line.strip() and not line.strip().startswith("#")
+    ]
+
+
+def _prompt_source_folders() -> Iterator[str]:
+    """逐个提示输入源文件夹，留空结束"""
+    while True:
+        source_folder = typer.prompt(
+            "源文件夹路径 (留空结束)",
+            default="",
+            show_default=False
+        )
+        if not source_folder:
+            return
+        yield source_folder
+
 
 @app.command()
-def init():
+def init(ctx: typer.Context):
     """初始化配置文件"""
-    config = ConfigManager()
+    from rich.markup import escape
+    from rich.prompt import Confirm
+    from .services._statcache import clear_stat_cache
+    config = get_config(ctx)
     console.print("初始化配置文件...", style="yellow")
     
     # 检查文件是否已初始化
     if config.config_path.exists():
-        if not typer.confirm(f"配置文件已存在于 {config.config_path}，是否重新初始化？"):
+        if not Confirm.ask(f"配置文件已存在于 {escape(str(config.config_path))}，是否重新初始化？",
+                           console=console, default=False):
             return
     
     # 创建默认配置
@@ -59,58 +196,87 @@ def init():
     # 交互式配置
     console.print("\n请输入配置信息:", style="cyan")
     
-    # 设置目标文件夹
-    target_folder = typer.prompt(
-        "目标文件夹路径",
-        default="~/Documents/README-Sync"
-    )
-    
-    if target_folder:
-        expanded_target = os.path.expanduser(target_folder)
-        try:
-            os.makedirs(expanded_target, exist_ok=True)
-            config.set_target_folder(target_folder)
-            console.print(f"✓ 目标文件夹已设置: {expanded_target}", style="green")
-        except Exception as e:
-            console.print(f"✗ 创建目标文件夹失败: {e}", style="red")
-            return
-    
-    # 添加源文件夹
-    while True:
-        source_folder = typer.prompt(
-            "源文件夹路径 (留空结束)",
-            default="",
-            show_default=False
+    # 所有修改在内存中累积，退出时一次写盘
+    with config.batch():
+        # 设置目标文件夹
+        target_folder = typer.prompt(
+            "目标文件夹路径",
+            default="~/Documents/README-Sync"
         )
         
-        if not source_folder:
-            break
+        if target_folder:
+            expanded_target = cached_expanduser(target_folder)
+            try:
+                os.makedirs(expanded_target, exist_ok=True)
+                clear_stat_cache()
+                config.set_target_folder(target_folder)
+                console.print(f"✓ 目标文件夹已设置: {expanded_target}", style="green")
+            except Exception as e:
+                console.print(f"✗ 创建目标文件夹失败: {e}", style="red")
+                return
         
-        if config.add_source_folder(source_folder):
-            console.print(f"✓ 已添加源文件夹: {os.path.expanduser(source_folder)}", style="green")
+        # 添加源文件夹（按真实路径去重后统一添加）
+        source_folders = []
+        seen = set()
+        if Confirm.ask("是否通过编辑器批量添加源文件夹？", console=console, default=False):
+            entered = _edit_source_folders()
         else:
-            console.print(f"✗ 添加源文件夹失败", style="red")
-    
+            entered = _prompt_source_folders()
+        
+        for source_folder in entered:
+            key = os.path.realpath(cached_expanduser(source_folder))
+            if key in seen:
+                console.print(f"已输入过该文件夹，跳过: {source_folder}", style="yellow")
+                continue
+            seen.add(key)
+            source_folders.append(source_folder)
+        
+        added = set(config.add_source_folders(source_folders))
+        for source_folder in source_folders:
+            expanded = cached_expanduser(source_folder)
+            if expanded in added:
+                console.print(f"✓ 已添加源文件夹: {expanded}", style="green")
+            else:
+                console.print(f"✗ 添加源文件夹失败: {source_folder}", style="red")
+        
     console.print(f"\n✓ 初始化完成！配置文件已保存至: {config.config_path}", style="green")
     console.print("使用 'readme-sync config list' 查看配置")
     console.print("使用 'readme-sync add-source <path>' 添加更多源文件夹")
 
 
 @app.command()
-def add_source(folder_path: str = typer.Argument(..., help="源文件夹路径")):
+def add_source(ctx: typer.Context, folder_path: str = typer.Argument(..., help="源文件夹路径")):
     """添加源文件夹"""
-    config = ConfigManager()
+    config = get_config(ctx)
     
-    if config.add_source_folder(folder_path):
-        console.print(f"✓ 已添加源文件夹: {os.path.expanduser(folder_path)}", style="green")
+    expanded = config.add_source_folder(folder_path)
+    if expanded:
+        console.print(f"✓ 已添加源文件夹: {expanded}", style="green")
     else:
         console.print(f"✗ 添加源文件夹失败: {folder_path}", style="red")
 
 
 @app.command()
-def remove_source(folder_path: str = typer.Argument(..., help="源文件夹路径")):
+def add_sources(
+    ctx: typer.Context,
+    folder_paths: List[str] = typer.Argument(..., help="一个或多个源文件夹路径")
+):
+    """批量添加源文件夹（配置文件只写入一次）"""
+    config = get_config(ctx)
+    
+    added = set(config.add_source_folders(folder_paths))
+    for folder_path in folder_paths:
+        expanded = cached_expanduser(folder_path)
+        if expanded in added:
+            console.print(f"✓ 已添加源文件夹: {expanded}", style="green")
+        else:
+            console.print(f"✗ 添加源文件夹失败: {folder_path}", style="red")
+
+
+@app.command()
+def remove_source(ctx: typer.Context, folder_path: str = typer.Argument(..., help="源文件夹路径")):
     """移除源文件夹"""
-    config = ConfigManager()
+    config = get_config(ctx)
     
     if config.remove_source_folder(folder_path):
         console.print(f"✓ 已移除源文件夹: {folder_path}", style="green")
@@ -119,28 +285,30 @@ def remove_source(folder_path: str = typer.Argument(..., help="源文件夹路
 
 
 @app.command()
-def set_target(folder_path: str = typer.Argument(..., help="目标文件夹路径")):
+def set_target(ctx: typer.Context, folder_path: str = typer.Argument(..., help="目标文件夹路径")):
     """设置目标文件夹"""
-    config = ConfigManager()
+    config = get_config(ctx)
     
-    if config.set_target_folder(folder_path):
-        console.print(f"✓ 目标文件夹已设置: {os.path.expanduser(folder_path)}", style="green")
+    expanded = config.set_target_folder(folder_path)
+    if expanded:
+        console.print(f"✓ 目标文件夹已设置: {expanded}", style="green")
     else:
         console.print(f"✗ 设置目标文件夹失败: {folder_path}", style="red")
 
 
 @app.command()
 def sync(
+    ctx: typer.Context,
     reverse: bool = typer.Option(False, "--reverse", help="从目标同步到源文件夹（谨慎使用）"),
     force: bool = typer.Option(False, "--force", help="强制反向同步，跳过安全确认")
 ):
     """执行同步操作"""
-    config = ConfigManager()
-    db = DatabaseManager()
-    engine = SyncEngine(config, db)
+    config = get_config(ctx)
+    db = get_db(ctx)
+    engine = get_engine(ctx)
     
     # 验证配置
-    errors = config.validate_config()
+    errors = get_config_errors(ctx)
     if errors:
         console.print("配置验证失败:", style="red")
         for error in errors:
@@ -153,21 +321,24 @@ def sync(
         if reverse:
             # 反向同步安全确认
             if not force:
-                console.print("⚠️  警告：反向同步会将目标文件夹的内容覆盖到源文件夹", style="yellow")
-                console.print("这可能会覆盖您在源项目中的修改！", style="yellow")
-                if not typer.confirm("确定要继续吗？"):
+                from rich.prompt import Confirm
+                if not Confirm.ask(
+                    "[yellow]⚠️  警告：反向同步会将目标文件夹的内容覆盖到源文件夹，"
+                    "这可能会覆盖您在源项目中的修改！确定要继续吗？[/yellow]",
+                    console=console, default=False,
+                ):
                     console.print("已取消反向同步")
                     return
             
             results = engine.reverse_sync_from_target()
-            console.print(f"\n反向同步完成:", style="green")
+            title = "反向同步完成:"
         else:
             results = engine.sync_all()
-            console.print(f"\n同步完成:", style="green")
+            title = "同步完成:"
         
-        for key, value in results.items():
-            if value > 0:
-                console.print(f"  {key}: {value}")
+        # 一次遍历、一次输出
+        parts = _result_lines(results)
+        console.print("\n".join([f"\n[green]{title}[/green]"] + parts))
     
     except Exception as e:
         console.print(f"✗ 同步失败: {e}", style="red")
@@ -175,100 +346,192 @@ def sync(
 
 @app.command()
 def watch(
-    interval: int = typer.Option(300, "--interval", help="监控间隔时间（秒）"),
+    ctx: typer.Context,
+    interval: Optional[int] = typer.Option(None, "--interval", help="全量同步间隔（秒）：轮询模式默认 300，事件模式下为兜底检查，默认 3600，0 表示关闭"),
+    debounce_ms: int = typer.Option(100, "--debounce-ms", help="事件防抖时间（毫秒），同一文件的连续变化只同步一次"),
+    poll: bool = typer.Option(False, "--poll", help="轮询模式：不监听文件系统事件，每隔 --interval 秒全量同步（适用于不支持事件通知的网络文件系统）"),
     daemon_mode: bool = typer.Option(False, "--daemon", help="后台运行模式")
 ):
-    """文件监控模式"""
-    config = ConfigManager()
-    db = DatabaseManager()
-    engine = SyncEngine(config, db)
+    """文件监控模式（基于文件系统事件，实时同步）"""
+    import threading
+    from .services.watcher import RealtimeSyncManager
+    config = get_config(ctx)
+    db = get_db(ctx)
+    engine = get_engine(ctx)
     
     # 验证配置
-    errors = config.validate_config()
+    errors = get_config_errors(ctx)
     if errors:
         console.print("配置验证失败:", style="red")
         for error in errors:
             console.print(f"  ✗ {error}", style="red")
         return
     
-    console.print(f"文件监控模式启动 (间隔: {interval}秒)", style="yellow")
+    if interval is None:
+        interval = 300 if poll else 3600
+    
+    if poll:
+        if interval <= 0:
+            console.print("轮询模式需要 --interval 大于 0", style="red")
+            return
+        console.print(f"文件监控模式启动 (轮询, 间隔: {interval}秒)", style="yellow")
+    else:
+        sweep = f"{interval}秒" if interval > 0 else "关闭"
+        console.print(f"文件监控模式启动 (防抖: {debounce_ms}毫秒, 全量同步间隔: {sweep})", style="yellow")
     console.print("按 Ctrl+C 停止监控")
     
+    # 上次同步开始前的文件快照；未变化时跳过整轮同步（不做哈希与数据库访问）
+    last_signature = None
+    
+    def sync_all_once(label: str):
+        nonlocal last_signature
+        try:
+            console.print(f"\n[{time.strftime(TIME_FMT)}] {label}...")
+            # 快照在同步之前获取：同步自身写入的文件会让下一轮再检查一次，不会漏掉同步期间的修改
+            signature = engine.scanner.tree_signature()
+            if signature == last_signature:
+                console.print("无变化，跳过同步")
+                return
+            
+            results = engine.sync_all()
+            # 有错误或冲突时不记录快照，下一轮即使文件未变也会重试
+            if results.get('errors', 0) == 0 and results.get('conflicts', 0) == 0:
+                last_signature = signature
+            else:
+                last_signature = None
+            
+            parts = _result_lines(results)
+            if parts:
+                console.print("\n".join(["[cyan]发现更新:[/cyan]"] + parts))
+            else:
+                console.print("无更新")
+        except Exception as e:
+            console.print(f"监控过程中发生错误: {e}", style="red")
+    
+    manager = None
+    if not poll:
+        manager = RealtimeSyncManager(config=config, db=db, sync_engine=engine,
+                                      debounce_time=debounce_ms / 1000)
+    stop_event = threading.Event()
+    
     try:
+        if manager is not None:
+            manager.start(validate=not _state(ctx).skip_validate)
+            if not manager.is_running:
+                console.print("✗ 实时同步启动失败", style="red")
+                raise typer.Exit(1)
+        else:
+            sync_all_once("检查更新")
+        
+        # 事件模式下变化由 watchdog 驱动，主线程只做可选的定期一致性检查；轮询模式下这里就是主循环
+        # 按单调时钟的截止时间调度：同步耗时不会累积漂移，系统时间跳变也不影响间隔
+        next_tick = time.monotonic()
         while True:
-            try:
-                console.print(f"\n[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] 检查更新...")
-                results = engine.sync_all()
-                
-                if any(results.values()):
-                    console.print("发现更新:", style="cyan")
-                    for key, value in results.items():
-                        if value > 0:
-                            console.print(f"  {key}: {value}")
-                else:
-                    console.print("无更新")
-                
-                time.sleep(interval)
-            
-            except KeyboardInterrupt:
-                console.print("\n监控已停止", style="yellow")
+            if interval > 0:
+                next_tick += interval
+                now = time.monotonic()
+                if next_tick < now:
+                    # 同步耗时超过间隔时跳过错过的周期，避免连续补跑
+                    next_tick = now + interval - (now - next_tick) % interval
+                timeout = next_tick - now
+            else:
+                timeout = None
+            if _wait_event(stop_event, timeout):
                 break
-            except Exception as e:
-                console.print(f"监控过程中发生错误: {e}", style="red")
-                time.sleep(interval)
+            sync_all_once("检查更新" if poll else "定期全量检查")
     
+    except KeyboardInterrupt:
+        console.print("\n监控已停止", style="yellow")
+    except typer.Exit:
+        raise
     except Exception as e:
         console.print(f"文件监控失败: {e}", style="red")
+    finally:
+        if manager is not None:
+            manager.stop()
 
 
 @app.command()
-def status():
+def status(
+    ctx: typer.Context,
+    as_json: bool = typer.Option(False, "--json", help="以 JSON 输出原始状态数据（时间为 Unix 时间戳）")
+):
     """查看同步状态"""
-    config = ConfigManager()
-    db = DatabaseManager()
-    engine = SyncEngine(config, db)
-    
-    console.print("README同步管理器状态:", style="bold cyan")
-    console.print("=" * 40)
+    from concurrent.futures import ThreadPoolExecutor
+    from contextlib import redirect_stdout
+    from rich.markup import escape
+    from .services._statcache import cached_exists
+    config = get_config(ctx)
+    db = get_db(ctx)
+    engine = get_engine(ctx)
     
     # 配置信息
     target_folder = config.get_target_folder()
     source_folders = config.get_enabled_source_folders()
     
-    console.print(f"目标文件夹: {target_folder or '未设置'}")
-    console.print(f"源文件夹数量: {len(source_folders)}")
+    # 多个源文件夹时并发检查（网络文件系统上每次 stat 的延迟可以相互重叠）
+    if len(source_folders) > 1:
+        with ThreadPoolExecutor(max_workers=min(32, len(source_folders))) as executor:
+            exists_flags = list(executor.map(cached_exists, source_folders))
+    else:
+        exists_flags = [cached_exists(folder) for folder in source_folders]
+    
+    if as_json:
+        data = {
+            "target_folder": target_folder or None,
+            "source_folders": [
+                {"path": folder, "exists": folder_exists}
+                for folder, folder_exists in zip(source_folders, exists_flags)
+            ],
+        }
+        try:
+            # 扫描过程的进度输出转到 stderr，保证 stdout 只有 JSON
+            with redirect_stdout(sys.stderr):
+                data["sync_status"] = engine.get_sync_status()
+        except Exception as e:
+            data["error"] = str(e)
+        _echo_json(data)
+        return
+    
+    # 先收集所有输出行，最后一次性写出
+    lines = ["[bold cyan]README同步管理器状态:[/bold cyan]", "=" * 40]
+    lines.append(f"目标文件夹: {escape(target_folder or '未设置')}")
+    lines.append(f"源文件夹数量: {len(source_folders)}")
     
     if source_folders:
-        for folder in source_folders:
-            exists = "✓" if os.path.exists(folder) else "✗"
-            style = "green" if exists == "✓" else "red"
-            console.print(f"  {exists} {folder}", style=style)
+        lines.extend(
+            f"[green]  ✓ {escape(folder)}[/green]" if folder_exists else f"[red]  ✗ {escape(folder)}[/red]"
+            for folder, folder_exists in zip(source_folders, exists_flags)
+        )
     
     # 同步状态
     try:
         status_info = engine.get_sync_status()
-        console.print(f"\n同步状态:", style="cyan")
-        console.print(f"  映射总数: {status_info['total_mappings']}")
-        console.print(f"  源文件数: {status_info['source_files']}")
-        console.print(f"  目标文件数: {status_info['target_files']}")
-        console.print(f"  过期文件数: {status_info['outdated_files']}")
-        console.print(f"  缺失源文件: {status_info['missing_source']}")
-        console.print(f"  缺失目标文件: {status_info['missing_target']}")
-        
         if status_info['last_sync'] > 0:
-            last_sync = datetime.fromtimestamp(status_info['last_sync'])
-            console.print(f"  上次同步: {last_sync.strftime('%Y-%m-%d %H:%M:%S')}")
+            last_sync = _fmt_ts(status_info['last_sync'])
         else:
-            console.print(f"  上次同步: 从未同步")
-    
+            last_sync = "从未同步"
+        lines.extend([
+            "\n[cyan]同步状态:[/cyan]",
+            f"  映射总数: {status_info['total_mappings']}",
+            f"  源文件数: {status_info['source_files']}",
+            f"  目标文件数: {status_info['target_files']}",
+            f"  过期文件数: {status_info['outdated_files']}",
+            f"  缺失源文件: {status_info['missing_source']}",
+            f"  缺失目标文件: {status_info['missing_target']}",
+            f"  上次同步: {last_sync}",
+        ])
     except Exception as e:
-        console.print(f"获取状态失败: {e}", style="red")
+        lines.append(f"[red]获取状态失败: {escape(str(e))}[/red]")
+    
+    console.print("\n".join(lines))
 
 
 @app.command()
-def mappings():
+def mappings(ctx: typer.Context):
     """列出已建立的源-目标映射关系"""
-    db = DatabaseManager()
+    from rich.table import Table
+    db = get_db(ctx)
     try:
         rows = db.get_all_mappings()
         if not rows:
@@ -282,10 +545,13 @@ def mappings():
         table.add_column("文件名", style="magenta", no_wrap=True)
         table.add_column("上次同步", style="dim", no_wrap=True)
 
-        from datetime import datetime
+        # 批量同步写入的映射大多共享同一秒的同步时间，按整秒缓存格式化结果
+        formatted = {}
         for m in rows:
-            last_sync = m.get("last_sync_time") or 0
-            ts = datetime.fromtimestamp(last_sync).strftime("%Y-%m-%d %H:%M:%S") if last_sync else "-"
+            last_sync = int(m.get("last_sync_time") or 0)
+            ts = formatted.get(last_sync)
+            if ts is None:
+                ts = formatted[last_sync] = _fmt_ts(last_sync) if last_sync else "-"
             table.add_row(
                 str(m.get("project_name", "-")),
                 str(m.get("source_path", "-")),
@@ -300,45 +566,63 @@ def mappings():
 
 
 @app.command()
-def scan():
+def scan(
+    ctx: typer.Context,
+    workers: Optional[int] = typer.Option(None, "--workers", "-w", min=1, help="并发遍历源文件夹的线程数（默认 8；网络文件系统可适当调大）"),
+    as_json: bool = typer.Option(False, "--json", help="以 JSON 数组输出扫描结果")
+):
     """扫描并显示README文件"""
-    config = ConfigManager()
+    from contextlib import redirect_stdout
+    from .core.scanner import FileScanner
+    from rich.live import Live
+    from rich.table import Table
+    config = get_config(ctx)
     scanner = FileScanner(config)
     
-    console.print("扫描README文件...", style="yellow")
-    
-    # 扫描所有文件
-    readme_files = scanner.scan_all_sources()
-    
-    if not readme_files:
-        console.print("未找到任何README文件", style="yellow")
+    if as_json:
+        # 边扫描边逐项写出 JSON 数组，不先在内存中构建完整列表；扫描过程的提示转到 stderr
+        out = sys.stdout
+        with redirect_stdout(sys.stderr):
+            out.write("[")
+            for index, file_info in enumerate(scanner.iter_all_sources(workers)):
+                out.write(("," if index else "") + json.dumps(file_info, ensure_ascii=False))
+            out.write("]\n")
+        out.flush()
         return
     
-    console.print(f"找到 {len(readme_files)} 个README文件:", style="green")
+    console.print("扫描README文件...", style="yellow")
     
-    # 创建表格显示结果
+    # 创建表格，边扫描边填充
     table = Table(title="README文件扫描结果")
     table.add_column("项目名称", style="cyan", no_wrap=True)
     table.add_column("源文件路径", style="green")
     table.add_column("目标文件名", style="yellow")
     
-    for file_info in readme_files:
-        table.add_row(
-            file_info['project_name'],
-            file_info['source_path'],
-            file_info['target_filename']
-        )
+    count = 0
+    with Live(table, console=console, transient=True):
+        for file_info in scanner.iter_all_sources(workers):
+            table.add_row(
+                file_info['project_name'],
+                file_info['source_path'],
+                file_info['target_filename']
+            )
+            count += 1
     
+    if not count:
+        console.print("未找到任何README文件", style="yellow")
+        return
+    
+    console.print(f"找到 {count} 个README文件:", style="green")
     console.print(table)
 
 
 @app.command()
-def cleanup():
+def cleanup(ctx: typer.Context):
     """清理数据库中的孤立映射"""
-    db = DatabaseManager()
+    db = get_db(ctx)
     
     console.print("清理数据库中的孤立映射...", style="yellow")
-    orphaned_count = db.cleanup_orphaned_mappings()
+    orphaned_count = db.cleanup_orphaned_mappings(get_config(ctx))
     
     if orphaned_count > 0:
         console.print(f"✓ 清理了 {orphaned_count} 个孤立映射", style="green")
@@ -347,10 +631,10 @@ def cleanup():
 
 
 @app.command()
-def move_unlinked():
+def move_unlinked(ctx: typer.Context):
     """移动未链接文件到子文件夹"""
-    config = ConfigManager()
-    db = DatabaseManager()
+    config = get_config(ctx)
+    db = get_db(ctx)
     
     # 获取目标文件夹
     target_folder = config.get_target_folder_from_config()
@@ -373,7 +657,7 @@ def move_unlinked():
     console.print(f"扫描目标文件夹中的未链接文件: {target_folder}", style="yellow")
     
     # 查找未链接文件
-    unlinked_files = db.find_unlinked_files(target_folder)
+    unlinked_files = db.find_unlinked_files(target_folder, subfolder)
     
     if not unlinked_files:
         console.print("✓ 没有发现未链接文件", style="green")
@@ -394,10 +678,10 @@ def move_unlinked():
 
 
 @app.command()
-def list_unlinked():
+def list_unlinked(ctx: typer.Context):
     """列出未链接文件"""
-    config = ConfigManager()
-    db = DatabaseManager()
+    config = get_config(ctx)
+    db = get_db(ctx)
     
     # 获取目标文件夹
     target_folder = config.get_target_folder_from_config()
@@ -412,7 +696,7 @@ def list_unlinked():
     console.print(f"扫描目标文件夹: {target_folder}", style="yellow")
     
     # 查找未链接文件
-    unlinked_files = db.find_unlinked_files(target_folder)
+    unlinked_files = db.find_unlinked_files(target_folder, config.get_unlinked_subfolder())
     
     if not unlinked_files:
         console.print("✓ 没有发现未链接文件", style="green")
@@ -433,15 +717,23 @@ def list_unlinked():
 
 @app.command()
 def smart_sync(
+    ctx: typer.Context,
     dry_run: bool = typer.Option(False, "--dry-run", help="仅显示需要同步的文件，不执行实际同步")
 ):
     """智能增量同步 - 安全地同步用户在Obsidian中的修改"""
-    config = ConfigManager()
-    db = DatabaseManager()
-    engine = SyncEngine(config, db)
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+    from .services._statcache import is_file_in_listing
+    from rich.console import Group
+    from rich.live import Live
+    from rich.progress import Progress
+    from rich.prompt import Confirm
+    from rich.table import Table
+    config = get_config(ctx)
+    db = get_db(ctx)
+    engine = get_engine(ctx)
     
     # 验证配置
-    errors = config.validate_config()
+    errors = get_config_errors(ctx)
     if errors:
         console.print("配置验证失败:", style="red")
         for error in errors:
@@ -455,70 +747,86 @@ def smart_sync(
         target_files = engine.scanner.scan_target_folder()
         pending_syncs = []
         
+        # 一次查询取回所有目标文件对应的映射
+        mappings = engine.db.find_mappings_by_targets([t['target_path'] for t in target_files])
+        
         for target_file in target_files:
             target_path = target_file['target_path']
             
             # 查找对应的源文件映射
-            mapping = engine.db.find_mapping_by_target(target_path)
+            mapping = mappings.get(target_path)
             if not mapping:
                 continue
             
             source_path = mapping['source_path']
-            if not os.path.exists(source_path):
+            if not is_file_in_listing(source_path):
                 continue
             
             # 使用智能策略判断是否需要同步
             sync_action = engine._determine_sync_action(source_path, target_path, mapping)
             
             if sync_action == 'target_to_source':
-                pending_syncs.append({
-                    'source_path': source_path,
-                    'target_path': target_path,
-                    'mapping': mapping
-                })
+                pending_syncs.append((source_path, target_path, mapping))
         
         if not pending_syncs:
             console.print("✓ 没有检测到需要反向同步的文件", style="green")
             return
         
         console.print(f"检测到 {len(pending_syncs)} 个文件需要反向同步:", style="cyan")
-        for sync in pending_syncs:
-            console.print(f"  {sync['target_path']} -> {sync['source_path']}")
+        console.print("\n".join(
+            f"  {target_path} -> {source_path}" for source_path, target_path, _ in pending_syncs
+        ), markup=False, highlight=False)
         
         if dry_run:
             console.print("\n这是干运行模式，没有执行实际同步", style="yellow")
             return
         
-        if not typer.confirm(f"\n确定要将这 {len(pending_syncs)} 个文件同步到源项目吗？"):
+        if not Confirm.ask(f"\n确定要将这 {len(pending_syncs)} 个文件同步到源项目吗？",
+                           console=console, default=False):
             console.print("已取消同步")
             return
         
-        # 执行同步
+        # 执行同步：文件复制并发进行，数据库映射最后在一个事务内批量写入
         synced = 0
         errors = 0
+        rows = []
         
-        with Progress() as progress:
-            task = progress.add_task("同步进度", total=len(pending_syncs))
+        # 进度条与逐文件结果合并到同一个 Live 中，由 Rich 按固定频率刷新
+        progress = Progress()
+        task = progress.add_task("同步进度", total=len(pending_syncs))
+        table = Table(show_header=False, box=None)
+        table.add_column("状态", no_wrap=True)
+        table.add_column("文件")
+        
+        with Live(Group(progress, table), console=console, refresh_per_second=20), \
+                ThreadPoolExecutor(max_workers=min(32, len(pending_syncs))) as executor:
+            # 每个 future 对应待同步项的目标路径
+            futures = {
+                executor.submit(engine._reverse_copy, source_path, target_path, mapping): target_path
+                for source_path, target_path, mapping in pending_syncs
+            }
             
-            for sync in pending_syncs:
+            for future in as_completed(futures):
+                target_path = futures[future]
                 try:
-                    result = engine._perform_reverse_sync(
-                        sync['source_path'], 
-                        sync['target_path'], 
-                        sync['mapping']
-                    )
-                    if result == 'reverse_synced':
-                        synced += 1
-                        console.print(f"✓ 同步完成: {sync['target_path']}", style="green")
+                    row = future.result()
+                    if row is not None:
+                        rows.append(row)
+                        table.add_row("[green]✓[/green]", target_path)
                     else:
                         errors += 1
-                        console.print(f"✗ 同步失败: {sync['target_path']}", style="red")
+                        table.add_row("[red]✗[/red]", target_path)
                 except Exception as e:
                     errors += 1
-                    console.print(f"✗ 同步失败 {sync['target_path']}: {e}", style="red")
+                    table.add_row("[red]✗[/red]", f"{target_path}: {e}")
                 
                 progress.advance(task)
         
+        if engine.db.update_mappings_bulk(rows):
+            synced = len(rows)
+        else:
+            errors += len(rows)
+        
         console.print(f"\n智能增量同步完成: 成功 {synced}, 失败 {errors}", style="green")
     
     except Exception as e:
@@ -527,19 +835,26 @@ def smart_sync(
 
 # 配置管理命令
 @config_app.command("list")
-def config_list():
+def config_list(
+    ctx: typer.Context,
+    as_json: bool = typer.Option(False, "--json", help="以 JSON 输出当前配置")
+):
     """显示当前配置"""
-    config = ConfigManager()
+    config = get_config(ctx)
+    if as_json:
+        _echo_json(config.config)
+        return
     config.print_config()
 
 
 @config_app.command("set")
 def config_set(
+    ctx: typer.Context,
     key: str = typer.Argument(..., help="配置项名称"),
     value: str = typer.Argument(..., help="配置项值")
 ):
     """设置配置项"""
-    config = ConfigManager()
+    config = get_config(ctx)
     
     if config.set(key, value):
         console.print(f"✓ 配置已更新: {key} = {value}", style="green")
@@ -548,9 +863,9 @@ def config_set(
 
 
 @config_app.command("get")
-def config_get(key: str = typer.Argument(..., help="配置项名称")):
+def config_get(ctx: typer.Context, key: str = typer.Argument(..., help="配置项名称")):
     """获取配置项"""
-    config = ConfigManager()
+    config = get_config(ctx)
     value = config.get(key)
     
     if value is not None:
@@ -561,13 +876,14 @@ def config_get(key: str = typer.Argument(..., help="配置项名称")):
 
 @config_app.command("cleanup-interval")
 def config_cleanup_interval(
+    ctx: typer.Context,
     interval: Optional[int] = typer.Argument(
         None, 
         help="清理间隔(秒)，最小60秒。如果不提供，则显示当前值"
     )
 ):
     """设置或查看清理间隔"""
-    config = ConfigManager()
+    config = get_config(ctx)
     
     if interval is None:
         # 显示当前值
@@ -600,10 +916,11 @@ def config_cleanup_interval(
 
 @config_app.command("unlinked-files")
 def config_unlinked_files(
+    ctx: typer.Context,
     enable: Optional[bool] = typer.Argument(None, help="启用或禁用未链接文件移动 (true/false)")
 ):
     """设置或查看未链接文件移动配置"""
-    config = ConfigManager()
+    config = get_config(ctx)
     
     if enable is None:
         # 显示当前值
@@ -625,10 +942,11 @@ def config_unlinked_files(
 
 @config_app.command("unlinked-subfolder")
 def config_unlinked_subfolder(
+    ctx: typer.Context,
     subfolder: Optional[str] = typer.Argument(None, help="未链接文件子文件夹名称")
 ):
     """设置或查看未链接文件子文件夹名称"""
-    config = ConfigManager()
+    config = get_config(ctx)
     
     if subfolder is None:
         # 显示当前值
@@ -649,6 +967,7 @@ def daemon_start(
     foreground: bool = typer.Option(False, "--foreground", "-f", help="前台运行（用于调试）")
 ):
     """启动守护进程"""
+    from .services.daemon import DaemonManager
     daemon_mgr = DaemonManager()
     
     if daemon_mgr.is_running():
@@ -669,6 +988,7 @@ def daemon_start(
 @daemon_app.command("stop")
 def daemon_stop():
     """停止守护进程"""
+    from .services.daemon import DaemonManager
     daemon_mgr = DaemonManager()
     
     if not daemon_mgr.is_running():
@@ -686,6 +1006,7 @@ def daemon_stop():
 @daemon_app.command("clean")
 def daemon_clean():
     """清理守护进程相关状态文件（pid/log/status/launchd日志）"""
+    from .services.daemon import DaemonManager
     daemon_mgr = DaemonManager()
     daemon_mgr.clean_state()
     console.print("已清理守护进程状态文件与日志", style="green")
@@ -694,6 +1015,7 @@ def daemon_clean():
 @daemon_app.command("restart")
 def daemon_restart():
     """重启守护进程"""
+    from .services.daemon import DaemonManager
     daemon_mgr = DaemonManager()
     
     console.print("重启守护进程...", style="yellow")
@@ -705,25 +1027,34 @@ def daemon_restart():
 
 
 @daemon_app.command("status")
-def daemon_status():
+def daemon_status(
+    as_json: bool = typer.Option(False, "--json", help="以 JSON 输出原始状态数据（时间为 Unix 时间戳）")
+):
     """查看守护进程状态"""
+    from .services.daemon import DaemonManager, format_uptime, format_memory
     daemon_mgr = DaemonManager()
     status = daemon_mgr.status()
     
-    console.print("守护进程状态:", style="bold cyan")
-    console.print("=" * 40)
+    if as_json:
+        _echo_json(status)
+        return
+    
+    lines = ["[bold cyan]守护进程状态:[/bold cyan]", "=" * 40]
     
     if status['running']:
-        console.print("状态: 运行中 ✓", style="green")
-        console.print(f"PID: {status['pid']}")
-        console.print(f"运行时间: {format_uptime(status['uptime'])}")
-        console.print(f"内存使用: {format_memory(status['memory_usage'])}")
-        console.print(f"CPU使用: {status['cpu_usage']:.1f}%")
-        
-        start_time = datetime.fromtimestamp(status['start_time'])
-        console.print(f"启动时间: {start_time.strftime('%Y-%m-%d %H:%M:%S')}")
+        start_time = _fmt_ts(status['start_time'])
+        lines.extend([
+            "[green]状态: 运行中 ✓[/green]",
+            f"PID: {status['pid']}",
+            f"运行时间: {format_uptime(status['uptime'])}",
+            f"内存使用: {format_memory(status['memory_usage'])}",
+            f"CPU使用: {status['cpu_usage']:.1f}%",
+            f"启动时间: {start_time}",
+        ])
     else:
-        console.print("状态: 未运行 ✗", style="red")
+        lines.append("[red]状态: 未运行 ✗[/red]")
+    
+    console.print("\n".join(lines))
 
 
 @daemon_app.command("logs")
@@ -732,15 +1063,20 @@ def daemon_logs(
     follow: bool = typer.Option(False, "--follow", "-f", help="持续显示日志")
 ):
     """查看守护进程日志"""
+    from .services.daemon import DaemonManager, follow_file
     daemon_mgr = DaemonManager()
+    # 日志原样按块写出，不在内存中拼接完整字符串
+    out = sys.stdout.buffer
     
     if follow:
         console.print("持续显示日志 (Ctrl+C 退出)...", style="yellow")
         try:
-            import subprocess
-            subprocess.run([
-                'tail', '-f', str(daemon_mgr.log_file)
-            ])
+            for chunk in daemon_mgr.iter_logs(lines):
+                out.write(chunk)
+            out.flush()
+            for chunk in follow_file(daemon_mgr.log_file):
+                out.write(chunk)
+                out.flush()
         except KeyboardInterrupt:
             console.print("\n停止显示日志")
         except FileNotFoundError:
@@ -748,14 +1084,21 @@ def daemon_logs(
         except Exception as e:
             console.print(f"显示日志失败: {e}", style="red")
     else:
-        logs = daemon_mgr.get_logs(lines)
-        console.print(logs)
+        try:
+            for chunk in daemon_mgr.iter_logs(lines):
+                out.write(chunk)
+            out.flush()
+        except FileNotFoundError:
+            console.print("日志文件不存在")
+        except Exception as e:
+            console.print(f"读取日志失败: {e}")
 
 
 # 添加autostart命令
 @app.command()
 def autostart():
     """配置开机自启动守护进程"""
+    from .services.autostart import get_platform_manager
     manager = get_platform_manager()
     
     if not manager:
@@ -3,10 +3,18 @@
 
 import os
 import re
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import Iterator, List, Dict, Optional, Tuple
 from ..services.config import ConfigManager
 
+# 并发遍历源文件夹时的默认线程数上限
+DEFAULT_SCAN_WORKERS = 8
+
+# 项目名清理用的正则：非法字符、连续连字符
+_INVALID_NAME_CHARS = re.compile(r'[^a-zA-Z0-9\-_\u4e00-\u9fff]')
+_REPEATED_DASHES = re.compile(r'-+')
+
 
 class FileScanner:
     """README文件扫描器"""
@@ -17,6 +25,10 @@ class FileScanner:
     
     def extract_project_name(self, readme_path: str) -> str:
         """从README文件路径提取项目名"""
+        return self._extract_project_name(readme_path, {})
+    
+    def _extract_project_name(self, readme_path: str, subdir_counts: Dict[str, int]) -> str:
+        """提取项目名；subdir_counts 缓存 目录 -> 子目录数，同一次扫描内同一上级目录只列一次"""
         path = Path(readme_path)
         parent_dir = path.parent.name
         
@@ -29,37 +41,61 @@ class FileScanner:
         if parent_dir.lower() in common_code_dirs:
             # 检查是否是项目分类目录（通常这些目录下会有多个子项目）
             grandparent_path = path.parent.parent
-            if grandparent_path.exists():
-                # 检查同级目录是否有其他项目目录
-                sibling_dirs = [d for d in grandparent_path.iterdir() 
-                               if d.is_dir() and d.name != parent_dir]
-                if len(sibling_dirs) >= 1:  # 如果有其他同级目录，说明这是项目分类
-                    # 保留当前目录名作为项目名
-                    pass
-                else:
-                    # 使用上级目录名
-                    grandparent = grandparent_path.name
-                    if grandparent and grandparent != '.':
-                        parent_dir = grandparent
+            key = str(grandparent_path)
+            subdir_count = subdir_counts.get(key)
+            if subdir_count is None:
+                subdir_count = subdir_counts[key] = self._count_subdirs(key)
+            if subdir_count >= 2:  # 除父目录外还有其他同级目录，说明这是项目分类
+                # 保留当前目录名作为项目名
+                pass
+            elif subdir_count:
+                # 使用上级目录名
+                grandparent = grandparent_path.name
+                if grandparent and grandparent != '.':
+                    parent_dir = grandparent
         
         # 清理项目名
         project_name = self._clean_project_name(parent_dir)
         return project_name
     
+    @staticmethod
+    def _count_subdirs(path: str) -> int:
+        """统计目录下的子目录数（跟随符号链接）；目录不存在或不可读时返回 0"""
+        count = 0
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir():
+                            count += 1
+                    except OSError:
+                        pass
+        except OSError:
+            return 0
+        return count
+    
     def _clean_project_name(self, name: str) -> str:
         """清理项目名中的非法字符"""
         # 移除项目名中的特殊字符，保留字母、数字、连字符
-        cleaned = re.sub(r'[^a-zA-Z0-9\-_\u4e00-\u9fff]', '-', name)
+        cleaned = _INVALID_NAME_CHARS.sub('-', name)
         # 移除首尾连字符
         cleaned = cleaned.strip('-')
         # 合并多个连字符为单个
-        cleaned = re.sub(r'-+', '-', cleaned)
+        cleaned = _REPEATED_DASHES.sub('-', cleaned)
         
         return cleaned or 'unknown-project'
     
     def generate_target_filename(self, project_name: str) -> str:
         """生成目标文件名"""
-        pattern = self.config.get_naming_pattern()
+        return self._format_target_filename(
+            project_name,
+            self.config.get_naming_pattern(),
+            self.config.get("naming_rules.case_style", "keep"),
+        )
+    
+    @staticmethod
+    def _format_target_filename(project_name: str, pattern: str, case_style: str) -> str:
+        """按给定命名模式与大小写风格生成目标文件名；批量扫描时由调用方预先取出配置项"""
         filename = pattern.format(project_name=project_name)
 
         # 强制扁平化：移除任何路径分隔符，避免在目标目录下创建子目录
@@ -67,7 +103,6 @@ class FileScanner:
         filename = filename.replace('/', '-').replace('\\', '-')
         
         # 处理大小写
-        case_style = self.config.get("naming_rules.case_style", "keep")
         if case_style == "lower":
             filename = filename.lower()
         elif case_style == "upper":
@@ -81,65 +116,104 @@ class FileScanner:
     
     def find_readme_files(self, source_folder: str) -> List[Dict[str, str]]:
         """在指定文件夹中递归查找README文件"""
-        readme_files = []
-        source_path = Path(source_folder)
-        
-        if not source_path.exists():
+        return list(self.iter_readme_files(source_folder))
+    
+    def iter_readme_files(self, source_folder: str) -> Iterator[Dict[str, str]]:
+        """在指定文件夹中递归查找README文件（生成器）"""
+        if not os.path.exists(source_folder):
             print(f"源文件夹不存在: {source_folder}")
-            return readme_files
+            return
         
-        # 递归查找README文件
-        for root, dirs, files in os.walk(source_folder):
-            # 检查当前路径是否被排除
-            if self.config.is_excluded(root):
-                continue
+        # DirEntry.path 以 os.path.join(源文件夹, ...) 构成，切掉前缀即得相对路径，无需 os.path.relpath
+        prefix_len = len(os.path.join(source_folder, ''))
+        # 命名配置在整次扫描中不变，循环外取一次，避免每个文件都按点号分隔键查找配置
+        pattern = self.config.get_naming_pattern()
+        case_style = self.config.get("naming_rules.case_style", "keep")
+        # 同一上级目录下的多个 README 共用一次目录列举
+        subdir_counts: Dict[str, int] = {}
+        for readme_path in self._walk_readme_paths(source_folder):
+            # 提取项目名
+            project_name = self._extract_project_name(readme_path, subdir_counts)
             
-            # 过滤掉被排除的目录
-            dirs[:] = [d for d in dirs if not self.config.is_excluded(os.path.join(root, d))]
+            # 生成目标文件名
+            target_filename = self._format_target_filename(project_name, pattern, case_style)
+            
+            yield {
+                'source_path': readme_path,
+                'project_name': project_name,
+                'target_filename': target_filename,
+                'relative_path': readme_path[prefix_len:]
+            }
+    
+    def _walk_readme_paths(self, root: str) -> Iterator[str]:
+        """基于 os.scandir 的递归遍历，顺序与 os.walk 自顶向下一致
+
+        DirEntry 自带文件类型信息，无需对每个条目额外 stat。
+        """
+        # 检查当前路径是否被排除
+        if self.config.is_excluded(root):
+            return
+        
+        try:
+            with os.scandir(root) as it:
+                entries = list(it)
+        except OSError:
+            return
+        
+        subdirs = []
+        for entry in entries:
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
             
-            for file in files:
-                # 检查是否为精确的README.md文件（大小写不敏感）
-                if file.lower() == 'readme.md':
-                    readme_path = os.path.join(root, file)
-                    
-                    # 检查路径是否被排除
-                    if self.config.is_excluded(readme_path):
-                        continue
-                    
-                    # 提取项目名
-                    project_name = self.extract_project_name(readme_path)
-                    
-                    # 生成目标文件名
-                    target_filename = self.generate_target_filename(project_name)
-                    
-                    readme_files.append({
-                        'source_path': readme_path,
-                        'project_name': project_name,
-                        'target_filename': target_filename,
-                        'relative_path': os.path.relpath(readme_path, source_folder)
-                    })
-        
-        return readme_files
-    
-    def scan_all_sources(self) -> List[Dict[str, str]]:
+            if is_dir:
+                # 与 os.walk 一致：不跟随目录符号链接，过滤掉被排除的目录
+                if not entry.is_symlink() and not self.config.is_excluded(entry.path):
+                    subdirs.append(entry.path)
+            # 检查是否为精确的README.md文件（大小写不敏感）
+            elif entry.name.lower() == 'readme.md' and not self.config.is_excluded(entry.path):
+                yield entry.path
+        
+        for subdir in subdirs:
+            yield from self._walk_readme_paths(subdir)
+    
+    def scan_all_sources(self, workers: Optional[int] = None) -> List[Dict[str, str]]:
         """扫描所有源文件夹"""
-        all_readme_files = []
+        return list(self.iter_all_sources(workers))
+    
+    def iter_all_sources(self, workers: Optional[int] = None) -> Iterator[Dict[str, str]]:
+        """扫描所有源文件夹（生成器，按源路径去重）
+
+        多个源文件夹时并发遍历以重叠目录 I/O，结果仍按配置顺序产出。
+        workers 为并发线程数，默认 min(DEFAULT_SCAN_WORKERS, 源文件夹数)；为 1 时逐个顺序遍历。
+        """
+        seen = set()
         source_folders = self.config.get_enabled_source_folders()
+        if workers is None:
+            workers = DEFAULT_SCAN_WORKERS
+        workers = min(max(1, workers), len(source_folders) or 1)
         
-        for folder in source_folders:
-            print(f"扫描文件夹: {folder}")
-            readme_files = self.find_readme_files(folder)
-            all_readme_files.extend(readme_files)
-            print(f"找到 {len(readme_files)} 个README文件")
+        if workers > 1:
+            executor = ThreadPoolExecutor(max_workers=workers)
+            results = executor.map(self.find_readme_files, source_folders)
+        else:
+            executor = None
+            results = (self.iter_readme_files(folder) for folder in source_folders)
         
-        # 去重（按源路径）
-        unique_files = {}
-        for file_info in all_readme_files:
-            source_path = file_info['source_path']
-            if source_path not in unique_files:
-                unique_files[source_path] = file_info
-        
-        return list(unique_files.values())
+        try:
+            for folder, readme_files in zip(source_folders, results):
+                print(f"扫描文件夹: {folder}")
+                found = 0
+                for file_info in readme_files:
+                    found += 1
+                    if file_info['source_path'] not in seen:
+                        seen.add(file_info['source_path'])
+                        yield file_info
+                print(f"找到 {found} 个README文件")
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=False)
     
     def scan_target_folder(self) -> List[Dict[str, str]]:
         """扫描目标文件夹中的所有Markdown文件"""
@@ -149,24 +223,67 @@ class FileScanner:
         if not target_folder or not os.path.exists(target_folder):
             return target_files
         
-        target_path = Path(target_folder)
-        
         # 递归扫描目标文件夹
-        for root, dirs, files in os.walk(target_folder):
-            for file in files:
-                if file.lower().endswith('.md'):
-                    file_path = os.path.join(root, file)
-                    relative_path = os.path.relpath(file_path, target_folder)
-                    
-                    target_files.append({
-                        'target_path': file_path,
-                        'filename': file,
-                        'relative_path': relative_path,
-                        'subfolder': os.path.dirname(relative_path) if os.path.dirname(relative_path) != '.' else ''
-                    })
+        prefix_len = len(os.path.join(target_folder, ''))
+        for file_path in self._walk_markdown_paths(target_folder):
+            relative_path = file_path[prefix_len:]
+            
+            target_files.append({
+                'target_path': file_path,
+                'filename': os.path.basename(file_path),
+                'relative_path': relative_path,
+                'subfolder': os.path.dirname(relative_path)
+            })
         
         return target_files
     
+    def _walk_markdown_paths(self, root: str) -> Iterator[str]:
+        """基于 os.scandir 递归列出 Markdown 文件，顺序与 os.walk 自顶向下一致（先当前目录文件，再子目录）"""
+        try:
+            with os.scandir(root) as it:
+                entries = list(it)
+        except OSError:
+            return
+        
+        subdirs = []
+        for entry in entries:
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+            
+            if is_dir:
+                # 与 os.walk 一致：不跟随目录符号链接
+                if not entry.is_symlink():
+                    subdirs.append(entry.path)
+            elif entry.name.lower().endswith('.md'):
+                yield entry.path
+        
+        for subdir in subdirs:
+            yield from self._walk_markdown_paths(subdir)
+    
+    def tree_signature(self) -> List[Tuple[str, int, int]]:
+        """源文件夹中的README与目标文件夹中的Markdown文件的 (路径, mtime_ns, 大小) 列表
+
+        只遍历目录并 stat 相关文件，不读取内容；两次结果相同说明期间没有需要同步的变化。
+        """
+        paths = []
+        for folder in self.config.get_enabled_source_folders():
+            paths.extend(self._walk_readme_paths(folder))
+        
+        target_folder = self.config.get_target_folder()
+        if target_folder:
+            paths.extend(self._walk_markdown_paths(target_folder))
+        
+        signature = []
+        for path in paths:
+            try:
+                st = os.stat(path)
+                signature.append((path, st.st_mtime_ns, st.st_size))
+            except OSError:
+                signature.append((path, -1, -1))
+        return signature
+    
     def detect_moved_files(self, db_manager) -> List[Dict[str, str]]:
         """检测被移动的目标文件"""
         moved_files = []
@@ -11,6 +11,9 @@ from ..services.config import ConfigManager
 from ..services.database import DatabaseManager
 from .scanner import FileScanner
 
+# 快速检查要求上次同步时间晚于文件修改时间至少该秒数，避免粗粒度时间戳下同一时间窗内的修改被忽略
+_QUICK_CHECK_MIN_AGE = 2.0
+
 
 class SyncEngine:
     """同步引擎"""
@@ -28,6 +31,9 @@ class SyncEngine:
         # 时间窗口过滤 - 记录最近同步的文件和时间
         self._recent_syncs: Dict[str, float] = {}
         self._sync_cooldown = 3.0  # 3秒冷却时间
+        
+        # sync_all 期间快速检查命中的源路径，结束时一次性刷新 last_sync_time；为 None 时逐个立即刷新
+        self._pending_sync_touch: Optional[List[str]] = None
     
     def _can_sync(self, file_path: str) -> bool:
         """检查文件是否可以同步（防止循环同步）"""
@@ -74,6 +80,16 @@ class SyncEngine:
     
     def sync_all(self) -> Dict[str, int]:
         """执行完整同步"""
+        self._pending_sync_touch = []
+        try:
+            return self._run_sync_all()
+        finally:
+            pending, self._pending_sync_touch = self._pending_sync_touch, None
+            if pending:
+                self.db.touch_sync_times(pending)
+    
+    def _run_sync_all(self) -> Dict[str, int]:
+        """完整同步的各个阶段"""
         print("开始执行完整同步...")
         
         results = {
@@ -117,7 +133,7 @@ class SyncEngine:
                 results['errors'] += 1
         
         # 4. 清理孤立映射
-        orphaned = self.db.cleanup_orphaned_mappings()
+        orphaned = self.db.cleanup_orphaned_mappings(self.config)
         if orphaned > 0:
             print(f"清理了 {orphaned} 个孤立映射")
 
@@ -242,18 +258,29 @@ class SyncEngine:
     
     def _determine_sync_action(self, source_path: str, target_path: str, mapping: Optional[Dict]) -> str:
         """决定同步操作类型 - 智能合并策略，尊重手动修改"""
-        source_exists = os.path.exists(source_path)
-        target_exists = os.path.exists(target_path)
-        
-        if not source_exists:
+        try:
+            source_st = os.stat(source_path)
+        except OSError:
             return 'no_sync'  # 源文件不存在
         
-        if not target_exists:
+        try:
+            target_st = os.stat(target_path)
+        except OSError:
             return 'source_to_target'  # 目标不存在，复制源文件
         
         # 比较文件内容和修改时间
-        source_mtime = os.path.getmtime(source_path)
-        target_mtime = os.path.getmtime(target_path)
+        source_mtime = source_st.st_mtime
+        target_mtime = target_st.st_mtime
+        if self._unchanged_since_sync(mapping, source_mtime, target_mtime):
+            # 快速检查：两端修改时间与上次同步记录一致且内容相同，不读取文件计算哈希
+            # 仍需推进 last_sync_time（冲突处理据此判断目标是否刚被编辑）；sync_all 期间合并为一次批量写入
+            pending = self._pending_sync_touch
+            if pending is not None:
+                pending.append(source_path)
+            else:
+                self.db.touch_sync_times([source_path])
+            return 'no_sync'
+        
         source_hash = self.db.get_file_hash(source_path)
         target_hash = self.db.get_file_hash(target_path)
         
@@ -300,6 +327,18 @@ class SyncEngine:
             else:
                 return 'source_to_target'  # 源文件较新，同步
     
+    @staticmethod
+    def _unchanged_since_sync(mapping: Optional[Dict], source_mtime: float, target_mtime: float) -> bool:
+        """两端修改时间都等于上次同步时记录的值，且当时两端内容一致"""
+        if not mapping or not mapping.get('source_hash'):
+            return False
+        if mapping['source_hash'] != mapping.get('target_hash'):
+            return False
+        if source_mtime != mapping.get('source_mtime') or target_mtime != mapping.get('target_mtime'):
+            return False
+        last_sync_time = mapping.get('last_sync_time') or 0
+        return last_sync_time - max(source_mtime, target_mtime) >= _QUICK_CHECK_MIN_AGE
+    
     def _handle_dual_modification(self, source_path: str, target_path: str, 
                                  source_mtime: float, target_mtime: float, last_sync_time: float) -> str:
         """处理双方都被修改的情况"""
@@ -383,6 +422,7 @@ class SyncEngine:
                      target_filename: str, action: str) -> str:
         """执行同步操作"""
         try:
+            copied = True
             if action == 'source_to_target':
                 # 在复制之前，先检查目标文件夹中是否已存在对应文件
                 if not os.path.exists(target_path):
@@ -391,6 +431,7 @@ class SyncEngine:
                         # 找到已存在的文件，更新映射而不复制
                         print(f"发现已存在的文件，更新映射: {existing_file}")
                         target_path = existing_file
+                        copied = False
                     else:
                         # 确保目标目录存在并复制文件
                         # 只有在必要时才创建目录（避免在根目录下创建不必要的子文件夹）
@@ -411,16 +452,10 @@ class SyncEngine:
                 shutil.copy2(target_path, source_path)
                 print(f"反向同步: {target_path} -> {source_path}")
             
-            # 更新数据库映射
-            self.db.add_file_mapping(source_path, target_path, project_name, target_filename)
-            
-            # 更新同步时间
-            source_hash = self.db.get_file_hash(source_path)
-            target_hash = self.db.get_file_hash(target_path)
-            source_mtime = os.path.getmtime(source_path)
-            target_mtime = os.path.getmtime(target_path)
-            
-            self.db.update_sync_time(source_path, source_hash, target_hash, source_mtime, target_mtime)
+            # 映射与同步时间一次写入
+            self.db.update_mappings_bulk([
+                self._mapping_row(source_path, target_path, project_name, target_filename, copied)
+            ])
             
             return 'synced'
         
@@ -431,37 +466,16 @@ class SyncEngine:
     def _perform_reverse_sync(self, source_path: str, target_path: str, mapping: Optional[Dict]) -> str:
         """执行反向同步操作（从目标同步到源）"""
         try:
-            if not os.path.exists(target_path):
-                print(f"目标文件不存在，无法反向同步: {target_path}")
-                return 'error'
-            
-            if not os.path.exists(source_path):
-                print(f"源文件不存在，无法反向同步: {source_path}")
+            row = self._reverse_copy(source_path, target_path, mapping)
+            if row is None:
                 return 'error'
             
-            # 执行反向同步
-            shutil.copy2(target_path, source_path)
-            print(f"反向同步: {target_path} -> {source_path}")
-            
-            # 更新数据库映射
             if mapping:
-                project_name = mapping.get('project_name', 'Unknown')
-                target_filename = mapping.get('target_filename')
-                
-                # 如果target_filename不存在，从路径中生成
-                if not target_filename:
-                    project_name_extracted = self.scanner.extract_project_name(source_path)
-                    target_filename = self.scanner.generate_target_filename(project_name_extracted)
-                
-                self.db.add_file_mapping(source_path, target_path, project_name, target_filename)
-            
-            # 更新同步时间
-            source_hash = self.db.get_file_hash(source_path)
-            target_hash = self.db.get_file_hash(target_path)
-            source_mtime = os.path.getmtime(source_path)
-            target_mtime = os.path.getmtime(target_path)
-            
-            self.db.update_sync_time(source_path, source_hash, target_hash, source_mtime, target_mtime)
+                # 映射与同步时间一次写入
+                self.db.update_mappings_bulk([row])
+            else:
+                self.db.update_sync_time(source_path, row['source_hash'], row['target_hash'],
+                                         row['source_mtime'], row['target_mtime'])
             
             return 'reverse_synced'
         
@@ -469,6 +483,46 @@ class SyncEngine:
             print(f"反向同步失败: {e}")
             return 'error'
     
+    def _reverse_copy(self, source_path: str, target_path: str, mapping: Optional[Dict]) -> Optional[Dict]:
+        """复制目标文件到源文件，返回待写入数据库的映射行（不访问数据库，可并发调用）"""
+        if not os.path.exists(target_path):
+            print(f"目标文件不存在，无法反向同步: {target_path}")
+            return None
+        
+        if not os.path.exists(source_path):
+            print(f"源文件不存在，无法反向同步: {source_path}")
+            return None
+        
+        # 执行反向同步
+        shutil.copy2(target_path, source_path)
+        print(f"反向同步: {target_path} -> {source_path}")
+        
+        project_name = (mapping or {}).get('project_name') or 'Unknown'
+        target_filename = (mapping or {}).get('target_filename')
+        
+        # 如果target_filename不存在，从路径中生成
+        if not target_filename:
+            project_name_extracted = self.scanner.extract_project_name(source_path)
+            target_filename = self.scanner.generate_target_filename(project_name_extracted)
+        
+        return self._mapping_row(source_path, target_path, project_name, target_filename, copied=True)
+    
+    def _mapping_row(self, source_path: str, target_path: str, project_name: str,
+                     target_filename: str, copied: bool) -> Dict:
+        """构造同步后的映射行；刚复制过的两端内容相同，只需读取一次计算哈希"""
+        source_hash = self.db.get_file_hash(source_path)
+        target_hash = source_hash if copied else self.db.get_file_hash(target_path)
+        return {
+            'source_path': source_path,
+            'target_path': target_path,
+            'project_name': project_name,
+            'renamed_filename': target_filename,
+            'source_hash': source_hash,
+            'target_hash': target_hash,
+            'source_mtime': os.path.getmtime(source_path),
+            'target_mtime': os.path.getmtime(target_path),
+        }
+    
     def _move_target_file(self, old_path: str, new_path: str):
         """移动目标文件"""
         try:
@@ -742,7 +796,14 @@ class SyncEngine:
             source_path = mapping['source_path']
             target_path = mapping['target_path']
             
-            if not os.path.exists(source_path) or not os.path.exists(target_path):
+            try:
+                source_mtime = os.stat(source_path).st_mtime
+                target_mtime = os.stat(target_path).st_mtime
+            except OSError:
+                continue
+            
+            # 两端自上次同步后均未修改时不可能冲突，无需读取文件计算哈希
+            if self._unchanged_since_sync(mapping, source_mtime, target_mtime):
                 continue
             
             source_hash = self.db.get_file_hash(source_path)
@@ -750,8 +811,6 @@ class SyncEngine:
             
             # 检查是否有内容差异
             if source_hash != target_hash:
-                source_mtime = os.path.getmtime(source_path)
-                target_mtime = os.path.getmtime(target_path)
                 last_sync_time = mapping.get('last_sync_time', 0)
                 
                 # 检查是否为实际冲突（双方都有修改）
@@ -785,14 +844,22 @@ class SyncEngine:
             source_path = mapping['source_path']
             target_path = mapping['target_path']
             
-            if not os.path.exists(source_path):
+            try:
+                source_st = os.stat(source_path)
+            except OSError:
                 missing_source += 1
                 continue
             
-            if not os.path.exists(target_path):
+            try:
+                target_st = os.stat(target_path)
+            except OSError:
                 missing_target += 1
                 continue
             
+            # 两端修改时间都与上次同步记录一致时视为未变化，跳过读取文件计算哈希
+            if self._unchanged_since_sync(mapping, source_st.st_mtime, target_st.st_mtime):
+                continue
+            
             # 检查是否过期
             current_source_hash = self.db.get_file_hash(source_path)
             current_target_hash = self.db.get_file_hash(target_path)
@@ -61,7 +61,7 @@ def main():
         from readme_sync.services.database import DatabaseManager
         
         config_manager = ConfigManager()
-        db_manager = DatabaseManager()
+        db_manager = DatabaseManager.from_config(config_manager)
         sync_engine = SyncEngine(config_manager, db_manager)
         results = sync_engine.sync_all()
         print(f"同步完成：扫描 {results['scanned']} 个文件，同步 {results['synced']} 个文件，反向同步 {results['reverse_synced']} 个文件")
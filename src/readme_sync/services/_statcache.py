@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""单次调用内的路径/stat 缓存 - 避免对同一路径重复 stat 与展开 ~"""
+
+import os
+from functools import lru_cache
+
+# 缓存代数：每次清空缓存时加一，依赖文件系统状态的上层缓存可据此判断是否失效
+_generation = 0
+
+
+@lru_cache(maxsize=4096)
+def cached_stat(path: str) -> os.stat_result:
+    """缓存 os.stat 结果（跟随符号链接，与 os.path.exists 语义一致）"""
+    return os.stat(path)
+
+
+@lru_cache(maxsize=4096)
+def cached_exists(path: str) -> bool:
+    """带缓存的 os.path.exists（不存在的结果同样缓存）"""
+    try:
+        cached_stat(path)
+        return True
+    except (OSError, ValueError):
+        return False
+
+
+@lru_cache(maxsize=4096)
+def cached_expanduser(path: str) -> str:
+    """带缓存的 os.path.expanduser（~user 形式会查询 pwd 数据库）"""
+    return os.path.expanduser(path)
+
+
+@lru_cache(maxsize=1024)
+def cached_dir_entries(path: str) -> dict:
+    """缓存目录条目（文件名 -> DirEntry）；目录不存在或不可读时返回空字典"""
+    try:
+        with os.scandir(path) as it:
+            return {entry.name: entry for entry in it}
+    except (OSError, ValueError):
+        return {}
+
+
+def is_file_in_listing(path: str) -> bool:
+    """通过父目录列表判断是否为普通文件：同一目录下的多次查询只需一次 scandir；
+    DirEntry 使用 scandir 返回的类型信息，非链接条目无需再 stat"""
+    parent, name = os.path.split(path)
+    entry = cached_dir_entries(parent or ".").get(name)
+    if entry is None:
+        return False
+    try:
+        return entry.is_file()
+    except OSError:
+        return False
+
+
+def stat_cache_generation() -> int:
+    """返回当前缓存代数"""
+    return _generation
+
+
+def clear_stat_cache():
+    """清空 stat 缓存；在创建/删除文件或目录后调用"""
+    global _generation
+    _generation += 1
+    cached_stat.cache_clear()
+    cached_exists.cache_clear()
+    cached_dir_entries.cache_clear()
@@ -5,6 +5,7 @@ import os
 import sys
 import shutil
 import subprocess
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional
 from .config import ConfigManager
@@ -31,11 +32,10 @@ class AutoStartManager:
     def _get_readme_sync_path(self) -> Optional[str]:
         """获取readme-sync命令路径"""
         try:
-            # 尝试通过which命令查找
-            result = subprocess.run(['which', 'readme-sync'], 
-                                  capture_output=True, text=True)
-            if result.returncode == 0:
-                return result.stdout.strip()
+            # 在 PATH 中查找（进程内完成，无需启动 which 子进程）
+            found = shutil.which('readme-sync')
+            if found:
+                return found
             
             # 如果没找到，尝试常见的安装路径
             possible_paths = [
@@ -285,8 +285,9 @@ WantedBy=multi-user.target
         print(f"创建systemd服务失败: {e}")
 
 
+@lru_cache(maxsize=1)
 def get_platform_manager():
-    """根据平台返回对应的自启动管理器"""
+    """根据平台返回对应的自启动管理器（进程内只探测一次）"""
     if sys.platform == 'darwin':
         return AutoStartManager()
     elif sys.platform.startswith('linux'):
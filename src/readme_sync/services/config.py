@@ -5,12 +5,50 @@ import os
 try:
     import yaml  # type: ignore
     _YAML_AVAILABLE = True
+    # 优先使用 libyaml 的 C 实现解析/输出，未编译 libyaml 时回退到纯 Python 版本
+    _YAML_LOADER = getattr(yaml, "CSafeLoader", None) or yaml.SafeLoader
+    _YAML_DUMPER = getattr(yaml, "CSafeDumper", None) or yaml.SafeDumper
 except Exception:
     yaml = None  # type: ignore
     _YAML_AVAILABLE = False
+    _YAML_LOADER = None
+    _YAML_DUMPER = None
+import copy
 import json
+from collections import OrderedDict
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
+
+from ._statcache import cached_exists, cached_expanduser, clear_stat_cache, stat_cache_generation
+
+
+# 已解析配置缓存：路径 -> (mtime_ns, 大小, 解析结果)，按最近使用顺序淘汰
+_CONFIG_CACHE: "OrderedDict[str, Tuple[int, int, Any]]" = OrderedDict()
+_CONFIG_CACHE_MAX = 8
+
+
+def _remember_config(path: str, st: os.stat_result, data: Any) -> None:
+    """记录某一文件状态对应的解析结果"""
+    _CONFIG_CACHE[path] = (st.st_mtime_ns, st.st_size, data)
+    _CONFIG_CACHE.move_to_end(path)
+    while len(_CONFIG_CACHE) > _CONFIG_CACHE_MAX:
+        _CONFIG_CACHE.popitem(last=False)
+
+
+def _parse_config_file(path: str, st: os.stat_result) -> Any:
+    """解析配置文件；文件的 mtime 与大小未变化时直接返回缓存结果，同一进程内不重复解析"""
+    cached = _CONFIG_CACHE.get(path)
+    if cached is not None and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+        _CONFIG_CACHE.move_to_end(path)
+        return cached[2]
+    with open(path, 'r', encoding='utf-8') as f:
+        if _YAML_AVAILABLE:
+            data = yaml.load(f, Loader=_YAML_LOADER)
+        else:
+            data = json.load(f)
+    _remember_config(path, st, data)
+    return data
 
 
 class ConfigManager:
@@ -18,22 +56,19 @@ class ConfigManager:
     
     def __init__(self, config_path: str = None, runtime_overrides: Optional[Dict[str, Any]] = None):
         """初始化配置管理器"""
-        # 恢复从 config.yaml 读取路径设置；移除旧的 Developer/Code 默认值。
-        # 优先级：--config 参数 > 环境变量 READMESYNC_CONFIG > 固定路径（Dropbox Cloud）
-        env_config = os.getenv("READMESYNC_CONFIG")
-
-        if config_path is None:
-            if env_config:
-                self.config_path = Path(env_config)
-            else:
-                # 默认集中配置路径（不再使用 ~/Developer/Code/...），但不会强制创建
-                self.config_path = Path("/Users/niceday/Developer/Cloud/Dropbox/-Code-/Data/srv/readme_flat/config.yaml")
-            self.config_dir = self.config_path.parent
-        else:
-            self.config_path = Path(config_path)
-            self.config_dir = self.config_path.parent
+        self.config_path = self.resolve_config_path(config_path)
+        self.config_dir = self.config_path.parent
         
         self._runtime_overrides = runtime_overrides or {}
+        # batch() 期间推迟写盘，退出时统一保存一次
+        self._batch_depth = 0
+        self._batch_dirty = False
+        # validate_config() 结果缓存：(配置文件 mtime_ns, size) -> 错误列表
+        self._validation_cache = None
+        # is_excluded() 使用的预处理排除规则：(精确名称集合, 后缀元组, 前缀元组)，首次使用时构建
+        self._exclusion_matcher = None
+        # get_enabled_source_folders() 结果缓存（展开后的路径），修改配置时失效
+        self._enabled_sources_cache = None
         # 不自动创建目录与文件，除非调用方需要持久化
         self.scan_folders_file = self.config_dir / "scan_folders.json"
         self.config = self.load_config()
@@ -45,6 +80,24 @@ class ConfigManager:
         if self._runtime_overrides:
             self._apply_runtime_overrides(self._runtime_overrides)
     
+    @staticmethod
+    def resolve_config_path(config_path: str = None) -> Path:
+        """解析配置文件路径（不读取文件）"""
+        # 恢复从 config.yaml 读取路径设置；移除旧的 Developer/Code 默认值。
+        # 优先级：--config 参数 > 环境变量 READMESYNC_CONFIG > 固定路径（Dropbox Cloud）
+        if config_path is not None:
+            return Path(config_path)
+        env_config = os.getenv("READMESYNC_CONFIG")
+        if env_config:
+            return Path(env_config)
+        # 默认集中配置路径（不再使用 ~/Developer/Code/...），但不会强制创建
+        return Path("/Users/niceday/Developer/Cloud/Dropbox/-Code-/Data/srv/readme_flat/config.yaml")
+
+    @classmethod
+    def config_dir_for(cls, config_path: str = None) -> Path:
+        """轻量获取配置目录：只解析路径，不加载/迁移配置"""
+        return cls.resolve_config_path(config_path).parent
+
     def get_default_config(self) -> Dict[str, Any]:
         """获取默认配置"""
         return {
@@ -97,15 +150,12 @@ class ConfigManager:
             raise RuntimeError(f"配置文件不存在: {self.config_path}")
         
         try:
-            with open(self.config_path, 'r', encoding='utf-8') as f:
-                if _YAML_AVAILABLE:
-                    config = yaml.safe_load(f)
-                else:
-                    import json as _json
-                    config = _json.load(f)
-                # 合并默认配置以确保所有必需的键都存在
-                default_config = self.get_default_config()
-                return self._merge_config(default_config, config)
+            st = os.stat(self.config_path)
+            # 缓存的解析结果会被多个实例共享，返回副本以免修改相互影响
+            config = copy.deepcopy(_parse_config_file(str(self.config_path), st))
+            # 合并默认配置以确保所有必需的键都存在
+            default_config = self.get_default_config()
+            return self._merge_config(default_config, config)
         except Exception as e:
             print(f"加载配置文件失败: {e}")
             return self.get_default_config()
@@ -124,15 +174,34 @@ class ConfigManager:
         
         return result
     
+    @contextmanager
+    def batch(self):
+        """批量修改配置：块内的 set()/save_config() 只标记待保存，退出时写盘一次"""
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0 and self._batch_dirty:
+                self._batch_dirty = False
+                self.save_config()
+    
     def save_config(self, config: Dict[str, Any] = None) -> bool:
         """保存配置文件"""
+        if config is None and self._batch_depth:
+            self._batch_dirty = True
+            return True
         try:
             config_to_save = config if config is not None else self.config
+            if self._matches_file_on_disk(config_to_save):
+                # 与文件当前内容一致（set() 写入相同值等情况），无需重新序列化与写盘
+                return True
             with open(self.config_path, 'w', encoding='utf-8') as f:
                 if _YAML_AVAILABLE:
                     yaml.dump(
                         config_to_save,
                         f,
+                        Dumper=_YAML_DUMPER,
                         default_flow_style=False,
                         allow_unicode=True,
                         indent=2,
@@ -140,10 +209,24 @@ class ConfigManager:
                 else:
                     import json as _json
                     _json.dump(config_to_save, f, ensure_ascii=False, indent=2)
+            # 以写入后的文件状态更新解析缓存，下次加载无需重新读取刚写入的文件
+            _remember_config(str(self.config_path), os.stat(self.config_path), copy.deepcopy(config_to_save))
             return True
         except Exception as e:
             print(f"保存配置文件失败: {e}")
             return False
+    
+    def _matches_file_on_disk(self, config: Dict[str, Any]) -> bool:
+        """配置是否与磁盘上的文件内容相同：借助解析缓存比较，文件的 mtime/大小变化后视为不同"""
+        path = str(self.config_path)
+        cached = _CONFIG_CACHE.get(path)
+        if cached is None:
+            return False
+        try:
+            st = os.stat(path)
+        except OSError:
+            return False
+        return cached[0] == st.st_mtime_ns and cached[1] == st.st_size and cached[2] == config
 
     def _apply_env_overrides(self) -> None:
         """基于环境变量覆盖运行时配置（不写回文件）
@@ -235,6 +318,9 @@ class ConfigManager:
         
         # 设置最终值
         current[keys[-1]] = value
+        self._validation_cache = None
+        self._exclusion_matcher = None
+        self._enabled_sources_cache = None
         return self.save_config()
     
     def _migrate_scan_folders(self):
@@ -281,15 +367,15 @@ class ConfigManager:
         normalized = []
         for item in folders:
             if isinstance(item, str):
-                normalized.append(os.path.expanduser(item))
+                normalized.append(cached_expanduser(item))
             elif isinstance(item, dict) and item.get("path"):
-                normalized.append(os.path.expanduser(item["path"]))
+                normalized.append(cached_expanduser(item["path"]))
         return normalized
     
     def get_target_folder(self) -> str:
         """获取目标文件夹（来自 config.yaml）"""
         target = self.get("target_folder", "")
-        return os.path.expanduser(target) if target else ""
+        return cached_expanduser(target) if target else ""
     
     def get_file_patterns(self) -> List[str]:
         """获取文件模式列表（无强制使用，仅保留向后兼容）"""
@@ -299,13 +385,13 @@ class ConfigManager:
         """获取排除模式列表（来自 config.yaml 的 exclusions）"""
         return self.get("exclusions", [])
     
-    def add_source_folder(self, folder_path: str, enabled: bool = True) -> bool:
-        """添加源文件夹"""
-        folder_path = os.path.expanduser(folder_path)
+    def add_source_folder(self, folder_path: str, enabled: bool = True) -> Optional[str]:
+        """添加源文件夹，成功时返回展开后的路径，失败返回 None"""
+        folder_path = cached_expanduser(folder_path)
         
         if not os.path.exists(folder_path):
             print(f"文件夹不存在: {folder_path}")
-            return False
+            return None
         
         source_folders = self.get("source_folders", [])
         
@@ -313,7 +399,8 @@ class ConfigManager:
         for folder in source_folders:
             if folder.get("path") == folder_path:
                 folder["enabled"] = enabled
-                return self.save_config()
+                self._enabled_sources_cache = None
+                return folder_path if self.save_config() else None
         
         # 添加新文件夹
         source_folders.append({
@@ -321,11 +408,35 @@ class ConfigManager:
             "enabled": enabled
         })
         
-        return self.set("source_folders", source_folders)
+        return folder_path if self.set("source_folders", source_folders) else None
+    
+    def add_source_folders(self, folder_paths: List[str], enabled: bool = True) -> List[str]:
+        """批量添加源文件夹（只写盘一次），返回成功添加的路径"""
+        source_folders = self.get("source_folders", [])
+        # 按路径建立索引，查重为 O(1)，不必每添加一个都线性遍历已有列表
+        by_path = {folder.get("path"): folder for folder in source_folders}
+        added = []
+        for folder_path in folder_paths:
+            folder_path = cached_expanduser(folder_path)
+            if not os.path.exists(folder_path):
+                print(f"文件夹不存在: {folder_path}")
+                continue
+            
+            folder = by_path.get(folder_path)
+            if folder is not None:
+                folder["enabled"] = enabled
+            else:
+                folder = by_path[folder_path] = {"path": folder_path, "enabled": enabled}
+                source_folders.append(folder)
+            added.append(folder_path)
+        
+        if added and not self.set("source_folders", source_folders):
+            return []
+        return added
     
     def remove_source_folder(self, folder_path: str) -> bool:
         """移除源文件夹"""
-        folder_path = os.path.expanduser(folder_path)
+        folder_path = cached_expanduser(folder_path)
         source_folders = self.get("source_folders", [])
         
         # 过滤掉指定文件夹
@@ -338,41 +449,59 @@ class ConfigManager:
     
     def get_enabled_source_folders(self) -> List[str]:
         """获取启用的源文件夹列表"""
-        source_folders = self.get("source_folders", [])
-        return [
-            os.path.expanduser(folder["path"]) 
-            for folder in source_folders 
-            if folder.get("enabled", True)
-        ]
-    
-    def set_target_folder(self, folder_path: str) -> bool:
-        """设置目标文件夹"""
-        folder_path = os.path.expanduser(folder_path)
+        if self._enabled_sources_cache is None:
+            source_folders = self.get("source_folders", [])
+            self._enabled_sources_cache = [
+                cached_expanduser(folder["path"]) 
+                for folder in source_folders 
+                if folder.get("enabled", True)
+            ]
+        # 返回副本，调用方修改列表不影响缓存
+        return list(self._enabled_sources_cache)
+    
+    def set_target_folder(self, folder_path: str) -> Optional[str]:
+        """设置目标文件夹，成功时返回展开后的路径，失败返回 None"""
+        folder_path = cached_expanduser(folder_path)
         
         # 创建目录如果不存在
         try:
             os.makedirs(folder_path, exist_ok=True)
         except Exception as e:
             print(f"创建目录失败: {e}")
-            return False
+            return None
+        finally:
+            clear_stat_cache()
         
-        return self.set("target_folder", folder_path)
+        return folder_path if self.set("target_folder", folder_path) else None
     
     def get_target_folder_from_config(self) -> str:
         """兼容方法：等同于 get_target_folder"""
         return self.get_target_folder()
     
+    def _get_exclusion_matcher(self) -> Tuple[frozenset, Tuple[str, ...], Tuple[str, ...]]:
+        """将排除规则按精确名称、"*xxx" 后缀、"xxx*" 前缀分类，扫描时每个路径只需一次集合查找与两次元组匹配"""
+        if self._exclusion_matcher is None:
+            exact, suffixes, prefixes = set(), [], []
+            for exclusion in self.get("exclusions", []):
+                exact.add(exclusion)
+                if exclusion.startswith('*'):
+                    suffixes.append(exclusion[1:])
+                if exclusion.endswith('*'):
+                    prefixes.append(exclusion[:-1])
+            self._exclusion_matcher = (frozenset(exact), tuple(suffixes), tuple(prefixes))
+        return self._exclusion_matcher
+    
     def is_excluded(self, path: str) -> bool:
         """检查路径是否被排除"""
-        exclusions = self.get("exclusions", [])
-        path_parts = Path(path).parts
+        exact, suffixes, prefixes = self._get_exclusion_matcher()
+        if os.altsep:
+            path = path.replace(os.altsep, os.sep)
         
-        for exclusion in exclusions:
-            # 检查目录或文件名是否匹配排除规则
-            if any(part == exclusion or 
-                   (exclusion.startswith('*') and part.endswith(exclusion[1:])) or
-                   (exclusion.endswith('*') and part.startswith(exclusion[:-1]))
-                   for part in path_parts):
+        # 检查目录或文件名是否匹配排除规则（与 Path.parts 一致，忽略空段与 "."）
+        for part in path.split(os.sep):
+            if not part or part == '.':
+                continue
+            if part in exact or part.endswith(suffixes) or part.startswith(prefixes):
                 return True
         
         return False
@@ -424,14 +553,33 @@ class ConfigManager:
         return self.set("sync_settings.unlinked_subfolder", subfolder_name)
     
     def validate_config(self) -> List[str]:
-        """验证配置有效性，返回错误列表"""
+        """验证配置有效性，返回错误列表
+
+        结果按配置文件的 (mtime, size) 与 stat 缓存代数缓存：配置文件未变化、
+        且期间没有清空过 stat 缓存（创建/删除目录后会清空）时直接返回上次结果。
+        """
+        try:
+            st = os.stat(self.config_path)
+            key = (st.st_mtime_ns, st.st_size, stat_cache_generation())
+        except OSError:
+            key = None
+        if key is not None and self._validation_cache and self._validation_cache[0] == key:
+            return list(self._validation_cache[1])
+        
+        errors = self._validate_config()
+        if key is not None:
+            self._validation_cache = (key, list(errors))
+        return errors
+    
+    def _validate_config(self) -> List[str]:
+        """执行实际的配置验证"""
         errors = []
         
         # 检查目标文件夹
         target_folder = self.get_target_folder()
         if not target_folder:
             errors.append("未设置目标文件夹")
-        elif not os.path.exists(target_folder):
+        elif not cached_exists(target_folder):
             errors.append(f"目标文件夹不存在: {target_folder}")
         
         # 检查源文件夹
@@ -440,7 +588,7 @@ class ConfigManager:
             errors.append("未设置有效的源文件夹")
         else:
             for folder in source_folders:
-                if not os.path.exists(folder):
+                if not cached_exists(folder):
                     errors.append(f"源文件夹不存在: {folder}")
         
         # 检查冲突解决策略
@@ -455,7 +603,7 @@ class ConfigManager:
         """打印当前配置"""
         print("当前配置:")
         if _YAML_AVAILABLE:
-            print(yaml.dump(self.config, default_flow_style=False, allow_unicode=True, indent=2))
+            print(yaml.dump(self.config, Dumper=_YAML_DUMPER, default_flow_style=False, allow_unicode=True, indent=2))
         else:
             import json as _json
             print(_json.dumps(self.config, ensure_ascii=False, indent=2))
@@ -9,11 +9,42 @@ import atexit
 import psutil
 import threading
 from pathlib import Path
-from typing import Optional
-from .watcher import RealtimeSyncManager
-from .database import DatabaseManager
+from typing import Iterator, List, Optional
 from .config import ConfigManager
 
+# Linux 上直接解析 /proc 获取进程信息（status 常被监控脚本轮询），其余平台使用 psutil
+_USE_PROCFS = sys.platform.startswith('linux') and hasattr(time, 'CLOCK_BOOTTIME')
+if _USE_PROCFS:
+    _CLK_TCK = os.sysconf('SC_CLK_TCK')
+    _PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+
+
+def _read_proc_stats(pid: int) -> dict:
+    """从 /proc/<pid>/stat 与 statm 读取启动时间、运行时间、RSS 与平均 CPU 占用
+
+    进程不存在时抛出 ProcessLookupError。
+    """
+    try:
+        with open(f'/proc/{pid}/stat', 'rb') as f:
+            stat = f.read()
+        with open(f'/proc/{pid}/statm', 'rb') as f:
+            statm = f.read()
+    except FileNotFoundError:
+        raise ProcessLookupError(pid)
+    
+    # 进程名可能包含空格和括号，从最后一个 ')' 之后开始按字段切分（第 3 个字段起）
+    fields = stat[stat.rindex(b')') + 2:].split()
+    utime, stime, starttime = int(fields[11]), int(fields[12]), int(fields[19])
+    
+    uptime = max(time.clock_gettime(time.CLOCK_BOOTTIME) - starttime / _CLK_TCK, 0.0)
+    cpu_seconds = (utime + stime) / _CLK_TCK
+    return {
+        'uptime': uptime,
+        'start_time': time.time() - uptime,
+        'memory_usage': int(statm.split()[1]) * _PAGE_SIZE,
+        'cpu_usage': cpu_seconds / uptime * 100 if uptime > 0 else 0.0,
+    }
+
 
 class DaemonManager:
     """守护进程管理器"""
@@ -136,6 +167,17 @@ class DaemonManager:
             }
         
         try:
+            if _USE_PROCFS:
+                info = _read_proc_stats(pid)
+                return {
+                    'running': True,
+                    'pid': pid,
+                    'uptime': info['uptime'],
+                    'memory_usage': info['memory_usage'],  # 内存使用量（字节）
+                    'cpu_usage': info['cpu_usage'],  # 自启动以来的平均占用
+                    'start_time': info['start_time']
+                }
+            
             process = psutil.Process(pid)
             
             # 获取进程信息
@@ -153,7 +195,7 @@ class DaemonManager:
                 'start_time': create_time
             }
             
-        except psutil.NoSuchProcess:
+        except (psutil.NoSuchProcess, ProcessLookupError):
             # 进程不存在，清理文件
             self._cleanup_files()
             return {
@@ -235,11 +277,14 @@ class DaemonManager:
         print(f"[守护进程] 启动时间: {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(start_time))}")
         
         try:
-            # 创建并启动实时同步管理器
-            self.sync_manager = RealtimeSyncManager(self.config_path)
+            # watchdog / SQLite 只在真正运行守护进程时导入，status/stop 等命令无需加载
+            from .watcher import RealtimeSyncManager
             
-            # 创建数据库管理器
-            self.db_manager = DatabaseManager()
+            # 创建并启动实时同步管理器（配置只解析一次）
+            self.sync_manager = RealtimeSyncManager(config=ConfigManager(self.config_path))
+            
+            # 与实时同步共用同一个数据库管理器
+            self.db_manager = self.sync_manager.db
             
             # 写入状态文件
             self._write_status("starting")
@@ -276,9 +321,7 @@ class DaemonManager:
     
     def _start_periodic_cleanup(self):
         """启动定期清理任务"""
-        # 获取配置管理器
-        config = ConfigManager()
-        cleanup_interval = config.get_cleanup_interval()
+        cleanup_interval = self.sync_manager.config.get_cleanup_interval()
         
         print(f"[守护进程] 启动定期清理任务，间隔: {cleanup_interval}秒")
         
@@ -302,8 +345,11 @@ class DaemonManager:
                 try:
                     print(f"[定期清理] 开始执行清理任务 - {time.strftime('%Y-%m-%d %H:%M:%S')}")
                     
+                    # 每轮重新读取一次配置（可能已被修改），本轮各步骤共用
+                    config = ConfigManager(self.config_path)
+                    
                     # 执行孤立映射清理
-                    orphaned_count = self.db_manager.cleanup_orphaned_mappings()
+                    orphaned_count = self.db_manager.cleanup_orphaned_mappings(config)
                     
                     if orphaned_count > 0:
                         print(f"[定期清理] 清理了 {orphaned_count} 个孤立映射")
@@ -311,7 +357,7 @@ class DaemonManager:
                         print("[定期清理] 没有发现孤立映射")
                     
                     # 执行未链接文件移动
-                    self._cleanup_unlinked_files()
+                    self._cleanup_unlinked_files(config)
                     
                     last_cleanup_time = current_time
                     
@@ -321,13 +367,9 @@ class DaemonManager:
             # 每秒检查一次停止事件
             self.stop_event.wait(1)
     
-    def _cleanup_unlinked_files(self):
+    def _cleanup_unlinked_files(self, config: ConfigManager):
         """清理未链接文件"""
         try:
-            from .config import ConfigManager
-            
-            config = ConfigManager()
-            
             # 检查是否启用未链接文件移动
             if not config.get_move_unlinked_files():
                 return
@@ -411,12 +453,14 @@ class DaemonManager:
             if not self.log_file.exists():
                 return "日志文件不存在"
             
-            with open(self.log_file, 'r') as f:
-                all_lines = f.readlines()
-                return ''.join(all_lines[-lines:])
+            return ''.join(tail_lines(self.log_file, lines))
         except Exception as e:
             return f"读取日志失败: {e}"
     
+    def iter_logs(self, lines: int = 50) -> Iterator[bytes]:
+        """按块产出最后 lines 行日志的原始字节；日志文件不存在时抛出 FileNotFoundError"""
+        return iter_tail(self.log_file, lines)
+    
     def clear_logs(self):
         """清理日志文件"""
         try:
@@ -427,6 +471,77 @@ class DaemonManager:
             print(f"清理日志文件失败: {e}")
 
 
+def _tail_offset(f, lines: int, chunk_size: int) -> int:
+    """从文件末尾向前按块查找换行符，返回最后 lines 行的起始偏移（只计数，不保留读到的数据）"""
+    f.seek(0, os.SEEK_END)
+    end = f.tell()
+    if lines <= 0 or end == 0:
+        return end
+    
+    # 文件以换行结尾时，末尾的换行属于最后一行，需要多找一个
+    f.seek(end - 1)
+    remaining = lines + 1 if f.read(1) == b'\n' else lines
+    
+    pos = end
+    while pos > 0:
+        step = min(chunk_size, pos)
+        pos -= step
+        f.seek(pos)
+        chunk = f.read(step)
+        idx = len(chunk)
+        while True:
+            idx = chunk.rfind(b'\n', 0, idx)
+            if idx < 0:
+                break
+            remaining -= 1
+            if remaining == 0:
+                return pos + idx + 1
+    return 0
+
+
+def iter_tail(path, lines: int = 50, chunk_size: int = 65536) -> Iterator[bytes]:
+    """按块产出文件最后 lines 行的原始字节；内存占用与行数无关"""
+    with open(path, 'rb') as f:
+        start = _tail_offset(f, lines, chunk_size)
+        end = f.seek(0, os.SEEK_END)
+        f.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            chunk = f.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def tail_lines(path, lines: int = 50, chunk_size: int = 65536) -> List[str]:
+    """返回文件最后 lines 行（无需读取整个文件）"""
+    if lines <= 0:
+        return []
+    data = b''.join(iter_tail(path, lines, chunk_size))
+    return data.decode('utf-8', errors='replace').splitlines(keepends=True)
+
+
+def follow_file(path, poll_interval: float = 0.25) -> Iterator[bytes]:
+    """类似 tail -f：从文件末尾开始，每次唤醒产出一块新写入的原始字节
+
+    只打开一次文件，通过 fstat 检测增长；文件被截断时从头重新读取。
+    """
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        while True:
+            chunk = f.read()
+            if chunk:
+                yield chunk
+                continue
+            
+            if os.fstat(f.fileno()).st_size < f.tell():
+                f.seek(0)
+                continue
+            
+            time.sleep(poll_interval)
+
+
 def format_uptime(seconds: float) -> str:
     """格式化运行时间"""
     days = int(seconds // 86400)
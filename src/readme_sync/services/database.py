@@ -4,10 +4,15 @@
 import sqlite3
 import os
 import hashlib
+import threading
 import time
 from pathlib import Path
 from .config import ConfigManager
-from typing import List, Dict, Optional, Tuple
+from typing import Iterator, List, Dict, Optional, Tuple
+
+# 修改时间距今不足该秒数的文件不缓存哈希：粗粒度时间戳的文件系统上，
+# 同一时间窗内的再次修改可能不改变 (mtime, size)
+_HASH_CACHE_MIN_AGE = 2.0
 
 
 class DatabaseManager:
@@ -17,17 +22,55 @@ class DatabaseManager:
         """初始化数据库"""
         if db_path is None:
             # 统一从配置文件目录读取数据库位置
-            cfg = ConfigManager()
-            config_dir = Path(cfg.get_config_dir())
-            config_dir.mkdir(parents=True, exist_ok=True)
-            db_path = config_dir / "database.db"
+            db_path = self.default_db_path(ConfigManager())
         
         self.db_path = db_path
+        # 每个线程复用一条连接，避免每次调用都重新打开数据库并设置 PRAGMA
+        self._local = threading.local()
+        # 文件哈希缓存：路径 -> ((mtime_ns, size, inode), 哈希)
+        self._hash_cache: Dict[str, Tuple[Tuple[int, int, int], str]] = {}
         self.init_database()
+
+    @staticmethod
+    def default_db_path(config: ConfigManager) -> Path:
+        """根据已加载的配置返回数据库路径（确保目录存在）"""
+        config_dir = Path(config.get_config_dir())
+        config_dir.mkdir(parents=True, exist_ok=True)
+        return config_dir / "database.db"
+
+    @classmethod
+    def from_config(cls, config: ConfigManager) -> "DatabaseManager":
+        """复用调用方已加载的配置，避免再次构造 ConfigManager 解析路径"""
+        return cls(cls.default_db_path(config))
+
+    def _open_connection(self) -> sqlite3.Connection:
+        """打开新连接并应用读写性能相关的 PRAGMA"""
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA cache_size=-50000")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA mmap_size=268435456")
+        return conn
+    
+    def _connect(self) -> sqlite3.Connection:
+        """返回当前线程的复用连接（fork 后的子进程会重新打开）
+
+        调用方以 ``with self._connect() as conn:`` 使用：退出时提交或回滚事务，但不关闭连接。
+        """
+        local = self._local
+        pid = os.getpid()
+        if getattr(local, 'conn', None) is None or local.pid != pid:
+            local.conn = self._open_connection()
+            local.pid = pid
+        conn = local.conn
+        conn.row_factory = None
+        return conn
     
     def init_database(self):
         """初始化数据库结构"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
+            # WAL 为持久化设置，建库时设置一次即可
+            conn.execute("PRAGMA journal_mode=WAL")
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS file_mappings (
                     id INTEGER PRIMARY KEY,
@@ -57,10 +100,25 @@ class DatabaseManager:
             conn.commit()
     
     def get_file_hash(self, file_path: str) -> str:
-        """计算文件哈希值"""
+        """计算文件哈希值
+
+        按 (mtime_ns, size, inode) 缓存：文件未变化时只需一次 stat，不再读取内容。
+        """
         try:
+            st = os.stat(file_path)
+            sig = (st.st_mtime_ns, st.st_size, st.st_ino)
+            cached = self._hash_cache.get(file_path)
+            if cached is not None and cached[0] == sig:
+                return cached[1]
+            
             with open(file_path, 'rb') as f:
-                return hashlib.md5(f.read()).hexdigest()
+                file_hash = hashlib.md5(f.read()).hexdigest()
+            
+            if time.time() - st.st_mtime >= _HASH_CACHE_MIN_AGE:
+                self._hash_cache[file_path] = (sig, file_hash)
+            else:
+                self._hash_cache.pop(file_path, None)
+            return file_hash
         except Exception:
             return ""
     
@@ -73,7 +131,7 @@ class DatabaseManager:
             source_mtime = os.path.getmtime(source_path) if os.path.exists(source_path) else 0
             target_mtime = os.path.getmtime(target_path) if os.path.exists(target_path) else 0
             
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 conn.execute("""
                     INSERT OR REPLACE INTO file_mappings 
                     (source_path, target_path, project_name, renamed_filename, 
@@ -88,9 +146,38 @@ class DatabaseManager:
             print(f"添加文件映射失败: {e}")
             return False
     
+    def update_mappings_bulk(self, rows: List[Dict]) -> bool:
+        """在单个事务内批量写入映射及同步信息
+
+        rows 中每项包含 source_path、target_path、project_name、renamed_filename、
+        source_hash、target_hash、source_mtime、target_mtime。
+        """
+        if not rows:
+            return True
+        try:
+            current_time = time.time()
+            with self._connect() as conn:
+                conn.executemany("""
+                    INSERT OR REPLACE INTO file_mappings 
+                    (source_path, target_path, project_name, renamed_filename, 
+                     source_hash, target_hash, source_mtime, target_mtime, 
+                     last_sync_time, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, julianday('now'))
+                """, [
+                    (row['source_path'], row['target_path'], row['project_name'],
+                     row['renamed_filename'], row['source_hash'], row['target_hash'],
+                     row['source_mtime'], row['target_mtime'], current_time)
+                    for row in rows
+                ])
+                conn.commit()
+            return True
+        except Exception as e:
+            print(f"批量更新文件映射失败: {e}")
+            return False
+    
     def get_file_mapping(self, source_path: str) -> Optional[Dict]:
         """获取文件映射"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             conn.row_factory = sqlite3.Row
             cursor = conn.execute(
                 "SELECT * FROM file_mappings WHERE source_path = ?", 
@@ -101,14 +188,30 @@ class DatabaseManager:
     
     def get_all_mappings(self) -> List[Dict]:
         """获取所有文件映射"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             conn.row_factory = sqlite3.Row
             cursor = conn.execute("SELECT * FROM file_mappings ORDER BY updated_at DESC")
             return [dict(row) for row in cursor.fetchall()]
     
+    def iter_all_mappings(self, batch_size: int = 1024) -> Iterator[Dict]:
+        """逐批迭代所有文件映射（大数据量时避免一次性构建完整列表）"""
+        # 使用独立连接，迭代期间调用方仍可通过其他方法读写数据库
+        conn = self._open_connection()
+        try:
+            conn.row_factory = sqlite3.Row
+            cursor = conn.execute("SELECT * FROM file_mappings ORDER BY updated_at DESC")
+            while True:
+                batch = cursor.fetchmany(batch_size)
+                if not batch:
+                    break
+                for row in batch:
+                    yield dict(row)
+        finally:
+            conn.close()
+    
     def find_mapping_by_target(self, target_path: str) -> Optional[Dict]:
         """根据目标路径查找映射"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             conn.row_factory = sqlite3.Row
             cursor = conn.execute(
                 "SELECT * FROM file_mappings WHERE target_path = ?", 
@@ -117,9 +220,29 @@ class DatabaseManager:
             row = cursor.fetchone()
             return dict(row) if row else None
     
+    def find_mappings_by_targets(self, target_paths: List[str], chunk_size: int = 900) -> Dict[str, Dict]:
+        """按目标路径批量查找映射，返回 目标路径 -> 映射
+
+        每批最多 chunk_size 个参数（低于 SQLite 旧版本 999 个变量的上限）。
+        """
+        result: Dict[str, Dict] = {}
+        paths = list(dict.fromkeys(target_paths))
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            for start in range(0, len(paths), chunk_size):
+                chunk = paths[start:start + chunk_size]
+                placeholders = ",".join("?" * len(chunk))
+                cursor = conn.execute(
+                    f"SELECT * FROM file_mappings WHERE target_path IN ({placeholders}) ORDER BY id",
+                    chunk
+                )
+                for row in cursor:
+                    result.setdefault(row['target_path'], dict(row))
+        return result
+    
     def find_mapping_by_hash(self, file_hash: str) -> Optional[Dict]:
         """根据哈希值查找映射"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             conn.row_factory = sqlite3.Row
             cursor = conn.execute(
                 "SELECT * FROM file_mappings WHERE source_hash = ? OR target_hash = ?", 
@@ -131,7 +254,7 @@ class DatabaseManager:
     def find_mapping_by_filename(self, renamed_filename: str) -> Optional[Dict]:
         """根据重命名后的目标文件名查找映射（忽略路径，仅匹配文件名）"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 conn.row_factory = sqlite3.Row
                 cursor = conn.execute(
                     "SELECT * FROM file_mappings WHERE lower(renamed_filename) = lower(?)",
@@ -149,7 +272,7 @@ class DatabaseManager:
     def update_target_path(self, old_target: str, new_target: str) -> bool:
         """更新目标文件路径（用于处理移动）"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 conn.execute("""
                     UPDATE file_mappings 
                     SET target_path = ?, updated_at = julianday('now')
@@ -167,7 +290,7 @@ class DatabaseManager:
         """更新同步时间信息"""
         try:
             current_time = time.time()
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 params = [current_time]
                 sql_parts = ["last_sync_time = ?", "updated_at = julianday('now')"]
                 
@@ -197,10 +320,27 @@ class DatabaseManager:
             print(f"更新同步时间失败: {e}")
             return False
     
+    def touch_sync_times(self, source_paths: List[str]) -> bool:
+        """在单个事务内把一批映射的 last_sync_time 刷新为当前时间（哈希与 mtime 不变）"""
+        if not source_paths:
+            return True
+        try:
+            current_time = time.time()
+            with self._connect() as conn:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.executemany(
+                    "UPDATE file_mappings SET last_sync_time = ?, updated_at = julianday('now') WHERE source_path = ?",
+                    [(current_time, path) for path in source_paths],
+                )
+            return True
+        except Exception as e:
+            print(f"批量更新同步时间失败: {e}")
+            return False
+    
     def remove_mapping(self, source_path: str) -> bool:
         """删除文件映射"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 conn.execute("DELETE FROM file_mappings WHERE source_path = ?", (source_path,))
                 conn.commit()
             return True
@@ -208,10 +348,24 @@ class DatabaseManager:
             print(f"删除文件映射失败: {e}")
             return False
     
+    def remove_mappings(self, source_paths: List[str]) -> bool:
+        """在单个事务内批量删除文件映射（一次获取写锁、一次提交）"""
+        if not source_paths:
+            return True
+        try:
+            with self._connect() as conn:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.executemany("DELETE FROM file_mappings WHERE source_path = ?",
+                                 [(path,) for path in source_paths])
+            return True
+        except Exception as e:
+            print(f"批量删除文件映射失败: {e}")
+            return False
+    
     def set_config(self, key: str, value: str) -> bool:
         """设置配置项"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 conn.execute("""
                     INSERT OR REPLACE INTO config (key, value, updated_at)
                     VALUES (?, ?, julianday('now'))
@@ -224,24 +378,26 @@ class DatabaseManager:
     
     def get_config(self, key: str, default: str = None) -> Optional[str]:
         """获取配置项"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.execute("SELECT value FROM config WHERE key = ?", (key,))
             row = cursor.fetchone()
             return row[0] if row else default
     
     def get_all_configs(self) -> Dict[str, str]:
         """获取所有配置项"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.execute("SELECT key, value FROM config")
             return dict(cursor.fetchall())
     
-    def cleanup_orphaned_mappings(self) -> int:
-        """清理数据库中的孤立映射（文件不存在或超出源文件夹范围）"""
-        from .config import ConfigManager
-        
-        orphaned_count = 0
+    def cleanup_orphaned_mappings(self, config: Optional[ConfigManager] = None) -> int:
+        """清理数据库中的孤立映射（文件不存在或超出源文件夹范围）
+
+        可传入调用方已加载的配置，避免重复解析配置文件。
+        """
+        orphaned = []
         mappings = self.get_all_mappings()
-        config = ConfigManager()
+        if config is None:
+            config = ConfigManager()
         enabled_sources = config.get_enabled_source_folders()
         
         for mapping in mappings:
@@ -265,16 +421,21 @@ class DatabaseManager:
                     print(f"移除孤立映射（超出范围）: {source_path}")
             
             if should_remove:
-                self.remove_mapping(source_path)
-                orphaned_count += 1
+                orphaned.append(source_path)
         
-        return orphaned_count
+        if orphaned and not self.remove_mappings(orphaned):
+            return 0
+        return len(orphaned)
     
-    def find_unlinked_files(self, target_folder: str) -> List[str]:
+    def find_unlinked_files(self, target_folder: str, unlinked_subfolder: Optional[str] = None) -> List[str]:
         """递归查找目标文件夹中的未链接文件（包括源地址不存在的文件）"""
         if not os.path.exists(target_folder):
             return []
         
+        # 未链接子文件夹名只取一次，不在遍历每个目录时重新读取配置
+        if unlinked_subfolder is None:
+            unlinked_subfolder = self._get_unlinked_subfolder_name()
+        
         # 获取所有映射
         mappings = self.get_all_mappings()
         
@@ -312,7 +473,7 @@ class DatabaseManager:
                     
                     elif os.path.isdir(item_path):
                         # 跳过unlinked文件夹本身，避免重复处理
-                        if os.path.basename(item_path) != self._get_unlinked_subfolder_name():
+                        if item != unlinked_subfolder:
                             scan_directory(item_path)
                             
             except PermissionError:
@@ -338,7 +499,7 @@ class DatabaseManager:
     
     def move_unlinked_files(self, target_folder: str, unlinked_subfolder: str = "unlinked") -> int:
         """移动未链接文件到子文件夹"""
-        unlinked_files = self.find_unlinked_files(target_folder)
+        unlinked_files = self.find_unlinked_files(target_folder, unlinked_subfolder)
         
         if not unlinked_files:
             return 0
@@ -17,15 +17,17 @@ class ReadmeFileHandler(FileSystemEventHandler):
     """README文件变化处理器"""
     
     def __init__(self, sync_engine: SyncEngine, config: ConfigManager, 
-                 source_folder: str = None, is_target_folder: bool = False):
+                 source_folder: str = None, is_target_folder: bool = False,
+                 debounce_time: float = 2):
         """初始化文件处理器"""
         self.sync_engine = sync_engine
         self.config = config
         self.source_folder = source_folder
         self.is_target_folder = is_target_folder
-        self.debounce_time = 2  # 防抖时间，秒
+        self.debounce_time = debounce_time  # 防抖时间，秒
         self.pending_events = {}  # 待处理事件
         self.lock = threading.Lock()
+        self.cond = threading.Condition(self.lock)
         
         # 启动防抖处理线程
         self.debounce_thread = threading.Thread(target=self._debounce_worker, daemon=True)
@@ -90,24 +92,36 @@ class ReadmeFileHandler(FileSystemEventHandler):
                 'timestamp': current_time,
                 'is_target': self.is_target_folder
             }
+            self.cond.notify()
     
     def _debounce_worker(self):
-        """防抖处理工作线程"""
+        """防抖处理工作线程（尾沿触发：同一路径在静默 debounce_time 后只处理一次）"""
         while True:
-            current_time = time.time()
             to_process = []
             
-            with self.lock:
-                for file_path, event_info in list(self.pending_events.items()):
-                    if current_time - event_info['timestamp'] >= self.debounce_time:
-                        to_process.append((file_path, event_info))
-                        del self.pending_events[file_path]
+            with self.cond:
+                while not to_process:
+                    if not self.pending_events:
+                        self.cond.wait()
+                        continue
+                    
+                    current_time = time.time()
+                    next_due = None
+                    for file_path, event_info in list(self.pending_events.items()):
+                        due = event_info['timestamp'] + self.debounce_time
+                        if due <= current_time:
+                            to_process.append((file_path, event_info))
+                            del self.pending_events[file_path]
+                        elif next_due is None or due < next_due:
+                            next_due = due
+                    
+                    if not to_process:
+                        # 睡到最早到期的事件，期间的新事件会唤醒并重新计算
+                        self.cond.wait(next_due - current_time)
             
             # 处理待同步事件
             for file_path, event_info in to_process:
                 self._process_file_change(file_path, event_info)
-            
-            time.sleep(0.5)  # 检查间隔
     
     def _process_file_change(self, file_path: str, event_info: Dict):
         """处理文件变化"""
@@ -287,22 +301,28 @@ class ReadmeFileHandler(FileSystemEventHandler):
 class RealtimeSyncManager:
     """实时同步管理器"""
     
-    def __init__(self, config_path: str = None):
-        """初始化实时同步管理器"""
-        self.config = ConfigManager(config_path)
-        self.db = DatabaseManager()
-        self.sync_engine = SyncEngine(self.config, self.db)
+    def __init__(self, config_path: str = None, config: ConfigManager = None,
+                 db: DatabaseManager = None, sync_engine: SyncEngine = None,
+                 debounce_time: float = 2):
+        """初始化实时同步管理器
+
+        可传入已创建的 config/db/sync_engine 以复用调用方的实例。
+        """
+        self.config = config or ConfigManager(config_path)
+        self.db = db or DatabaseManager.from_config(self.config)
+        self.sync_engine = sync_engine or SyncEngine(self.config, self.db)
+        self.debounce_time = debounce_time
         self.observer = Observer()
         self.is_running = False
         
-    def start(self):
-        """启动实时同步"""
+    def start(self, validate: bool = True):
+        """启动实时同步；validate 为 False 时跳过配置验证（调用方已验证或显式跳过）"""
         if self.is_running:
             print("[实时同步] 已在运行中")
             return
         
         # 验证配置
-        errors = self.config.validate_config()
+        errors = self.config.validate_config() if validate else []
         if errors:
             print("[实时同步] 配置验证失败:")
             for error in errors:
@@ -313,14 +333,16 @@ class RealtimeSyncManager:
         source_folders = self.config.get_enabled_source_folders()
         for folder in source_folders:
             if os.path.exists(folder):
-                handler = ReadmeFileHandler(self.sync_engine, self.config, folder, False)
+                handler = ReadmeFileHandler(self.sync_engine, self.config, folder, False,
+                                            self.debounce_time)
                 self.observer.schedule(handler, folder, recursive=True)
                 print(f"[实时同步] 监控源文件夹: {folder}")
         
         # 添加目标文件夹监控
         target_folder = self.config.get_target_folder()
         if target_folder and os.path.exists(target_folder):
-            handler = ReadmeFileHandler(self.sync_engine, self.config, None, True)
+            handler = ReadmeFileHandler(self.sync_engine, self.config, None, True,
+                                        self.debounce_time)
             self.observer.schedule(handler, target_folder, recursive=True)
             print(f"[实时同步] 监控目标文件夹: {target_folder}")
         